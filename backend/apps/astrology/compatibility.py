@@ -15,6 +15,9 @@ ASPECTS = {
 HARMONY_ASPECTS = {'trine', 'sextile', 'conjunction'}
 TENSION_ASPECTS = {'square', 'opposition'}
 
+# Planets compared in synastry
+KEY_PLANETS = ['sun', 'moon', 'venus', 'mars', 'mercury']
+
 
 def calculate_aspect(long1: float, long2: float) -> Tuple[Optional[str], Optional[float]]:
     """
@@ -57,13 +60,12 @@ def calculate_synastry(chart1_planets: Dict, chart2_planets: Dict) -> Dict:
         }
     """
     aspects: List[Dict] = []
-    key_planets = ['sun', 'moon', 'venus', 'mars', 'mercury']
 
-    for p1 in key_planets:
+    for p1 in KEY_PLANETS:
         if p1 not in chart1_planets or chart1_planets[p1] is None:
             continue
 
-        for p2 in key_planets:
+        for p2 in KEY_PLANETS:
             if p2 not in chart2_planets or chart2_planets[p2] is None:
                 continue
 
@@ -80,11 +82,19 @@ def calculate_synastry(chart1_planets: Dict, chart2_planets: Dict) -> Dict:
                     'orb': orb,
                 })
 
+    return synastry_from_aspects(aspects)
+
+
+def synastry_from_aspects(aspects: List[Dict]) -> Dict:
+    """
+    Build the calculate_synastry() result from its aspect list.
+
+    Lets a stored breakdown be rebuilt from its aspects alone.
+    """
     harmony_count = sum(1 for a in aspects if a['aspect'] in HARMONY_ASPECTS)
     tension_count = sum(1 for a in aspects if a['aspect'] in TENSION_ASPECTS)
 
-    # Calculate overall score (50 baseline, +10 per harmony, -5 per tension)
-    overall = max(0, min(100, 50 + (harmony_count * 10) - (tension_count * 5)))
+    overall = _synastry_score(harmony_count, tension_count)
 
     # Generate interpretation
     interpretation = _generate_interpretation(aspects, harmony_count, tension_count)
@@ -98,6 +108,39 @@ def calculate_synastry(chart1_planets: Dict, chart2_planets: Dict) -> Dict:
     }
 
 
+def calculate_synastry_score(chart1_planets: Dict, chart2_planets: Dict) -> int:
+    """
+    Calculate only the overall synastry score between two charts.
+
+    Same result as calculate_synastry()['overall_compatibility'] without
+    building the aspect list or interpretation.
+    """
+    harmony_count = 0
+    tension_count = 0
+
+    for p1 in KEY_PLANETS:
+        if chart1_planets.get(p1) is None:
+            continue
+        long1 = chart1_planets[p1]['longitude']
+
+        for p2 in KEY_PLANETS:
+            if chart2_planets.get(p2) is None:
+                continue
+
+            aspect, _ = calculate_aspect(long1, chart2_planets[p2]['longitude'])
+            if aspect in HARMONY_ASPECTS:
+                harmony_count += 1
+            elif aspect in TENSION_ASPECTS:
+                tension_count += 1
+
+    return _synastry_score(harmony_count, tension_count)
+
+
+def _synastry_score(harmony_count: int, tension_count: int) -> int:
+    """Overall score: 50 baseline, +10 per harmony, -5 per tension, clamped 0-100."""
+    return max(0, min(100, 50 + (harmony_count * 10) - (tension_count * 5)))
+
+
 def _generate_interpretation(
     aspects: List[Dict],
     harmony_count: int,
@@ -0,0 +1,138 @@
+"""
+Angular-bin index for astrology-aware candidate retrieval.
+
+Synastry harmony comes from planets landing within orb of 0/60/120 degrees of
+each other. For a given chart, the longitudes that would form a harmonious
+aspect with its Sun, Moon and Venus are a handful of short arcs, so candidates
+can be found by looking up which users have planets in those degree bins.
+"""
+
+import math
+from collections import defaultdict
+from functools import reduce
+from operator import add
+from typing import Collection, Dict, List, Optional, Set, Tuple
+
+from django.db.models import Count, Q
+
+from apps.astrology.compatibility import ASPECTS, HARMONY_ASPECTS, KEY_PLANETS
+
+from .models import ChartBin
+
+# Planets of the requesting chart whose harmonious arcs are looked up
+QUERY_PLANETS = ('sun', 'moon', 'venus')
+
+
+def chart_bins(chart_data: Optional[Dict]) -> Dict[str, int]:
+    """
+    Map each synastry planet in a chart to its whole-degree longitude bin.
+
+    Args:
+        chart_data: Serialized chart (User.chart_data)
+
+    Returns:
+        {planet: degree (0-359)}
+    """
+    planets = (chart_data or {}).get('planets') or {}
+
+    bins = {}
+    for planet in KEY_PLANETS:
+        position = planets.get(planet)
+        if position and position.get('longitude') is not None:
+            bins[planet] = int(math.floor(position['longitude'])) % 360
+    return bins
+
+
+def harmonious_bins(longitude: float) -> Set[int]:
+    """
+    Degree bins where a planet would form a harmonious aspect with `longitude`.
+
+    Bins partly inside an orb are included, so this is a superset of the
+    positions calculate_aspect() would accept.
+    """
+    bins: Set[int] = set()
+    for aspect_name in HARMONY_ASPECTS:
+        angle, max_orb = ASPECTS[aspect_name]
+        for center in (longitude + angle, longitude - angle):
+            start = int(math.floor(center - max_orb))
+            end = int(math.floor(center + max_orb))
+            bins.update(degree % 360 for degree in range(start, end + 1))
+    return bins
+
+
+def index_user_chart(user) -> bool:
+    """
+    Bring a user's ChartBin rows in line with their chart.
+
+    Returns:
+        True if the index was rewritten
+    """
+    wanted = chart_bins(user.chart_data)
+    current = dict(
+        ChartBin.objects.filter(user=user).values_list('planet', 'degree')
+    )
+    if wanted == current:
+        return False
+
+    ChartBin.objects.filter(user=user).delete()
+    ChartBin.objects.bulk_create([
+        ChartBin(user=user, planet=planet, degree=degree)
+        for planet, degree in wanted.items()
+    ])
+    return True
+
+
+def get_aspect_candidate_ids(
+    user,
+    queryset,
+    limit: int,
+    exclude: Collection[int] = (),
+) -> List[Tuple[int, int]]:
+    """
+    Find the candidates with the most harmonious aspect hits against a chart.
+
+    Args:
+        user: The requesting user
+        queryset: Eligible candidates (already filtered)
+        limit: Maximum number of results
+        exclude: Candidate ids to skip (e.g. the user's seen-set)
+
+    Returns:
+        List of (user_id, hits), most hits first
+    """
+    planets = (user.chart_data or {}).get('planets') or {}
+
+    # A bin inside the arcs of several query planets counts once per planet
+    weights: Dict[int, int] = defaultdict(int)
+    for planet in QUERY_PLANETS:
+        position = planets.get(planet)
+        if not position or position.get('longitude') is None:
+            continue
+        for degree in harmonious_bins(position['longitude']):
+            weights[degree] += 1
+
+    if not weights:
+        return []
+
+    bins_by_weight: Dict[int, List[int]] = defaultdict(list)
+    for degree, weight in weights.items():
+        bins_by_weight[weight].append(degree)
+
+    hits = reduce(add, (
+        Count('id', filter=Q(degree__in=degrees)) * weight
+        for weight, degrees in bins_by_weight.items()
+    ))
+
+    rows = ChartBin.objects.filter(
+        planet__in=KEY_PLANETS,
+        degree__in=list(weights),
+        user__in=queryset.values('id'),
+    ).values('user_id').annotate(
+        hits=hits
+    ).order_by('-hits', 'user_id')[:limit + len(exclude)]
+
+    return [
+        (row['user_id'], row['hits'])
+        for row in rows
+        if row['user_id'] not in exclude
+    ][:limit]
@@ -0,0 +1,69 @@
+"""
+Latency budgets for scans.
+
+A Deadline is handed down to candidate retrieval, which visits candidates in
+priority order and stops once the deadline has passed, returning the best
+results found so far. The deadline remembers that it was hit, so callers can
+flag the result as partial and let the background feed refresh finish the
+work.
+
+Scans and deadline hits are counted in the cache and hits are logged.
+"""
+
+import logging
+import time
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+SCANS_KEY = 'metrics:scan:total'
+DEADLINE_HITS_KEY = 'metrics:scan:deadline_hits'
+
+
+class Deadline:
+    """The point in time a scan should finish by."""
+
+    __slots__ = ('budget_ms', 'expires_at', 'hit')
+
+    def __init__(self, budget_ms: int):
+        self.budget_ms = budget_ms
+        self.expires_at = time.monotonic() + budget_ms / 1000
+        self.hit = False
+
+    @classmethod
+    def for_scan(cls) -> Optional['Deadline']:
+        """Deadline from SCAN_LATENCY_BUDGET_MS, or None when scans are unbounded."""
+        budget_ms = settings.SCAN_LATENCY_BUDGET_MS
+        return cls(budget_ms) if budget_ms else None
+
+    def expired(self) -> bool:
+        if not self.hit and time.monotonic() >= self.expires_at:
+            self.hit = True
+        return self.hit
+
+
+def _increment(key: str):
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:  # evicted in between
+        cache.set(key, 1, timeout=None)
+
+
+def record_scan(user, deadline: Optional[Deadline]):
+    """Count a scan, and whether it ran out of budget."""
+    _increment(SCANS_KEY)
+    if deadline is not None and deadline.hit:
+        _increment(DEADLINE_HITS_KEY)
+        logger.info('Scan for user %s hit its %d ms deadline', user.id, deadline.budget_ms)
+
+
+def scan_metrics() -> Dict[str, int]:
+    """Scan and deadline hit counts so far."""
+    return {
+        'scans': cache.get(SCANS_KEY, 0),
+        'deadline_hits': cache.get(DEADLINE_HITS_KEY, 0),
+    }
@@ -0,0 +1,32 @@
+"""
+Short-lived locks in the shared cache.
+
+cache.add only succeeds for the first caller, on every backend, so it works
+as a lock across workers and hosts. The timeout frees a lock whose holder
+crashed; holders must finish well within it.
+"""
+
+import time
+from contextlib import contextmanager
+
+from django.core.cache import cache
+
+# Seconds a crashed holder can keep a lock, and how long callers wait for it
+LOCK_TIMEOUT = 5
+LOCK_WAIT = 1.0
+LOCK_POLL = 0.005
+
+
+@contextmanager
+def cache_lock(key: str):
+    """Hold the lock `key`. Yields False if it was not free in time."""
+    give_up_at = time.monotonic() + LOCK_WAIT
+    while not cache.add(key, 1, LOCK_TIMEOUT):
+        if time.monotonic() >= give_up_at:
+            yield False
+            return
+        time.sleep(LOCK_POLL)
+    try:
+        yield True
+    finally:
+        cache.delete(key)
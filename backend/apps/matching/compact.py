@@ -0,0 +1,99 @@
+"""
+Compact storage for compatibility breakdowns.
+
+Resonance and Match rows used to store the full calculate_full_compatibility()
+dict, prose included. They now store only the inputs it is derived from:
+
+    {
+        'v': 1,
+        'u': [[life_path, sun_sign], [life_path, sun_sign]],  # user1, user2
+        'n': [life_path_harmony, soul_connection, expression_sync, personality_match],
+        'a': [[planet1, planet2, aspect, orb], ...] or None,  # KEY_PLANETS / ASPECT_NAMES indexes
+    }
+
+expand_compatibility() rebuilds the full dict when it is read. Rows written
+before this format (no 'v' key) are returned unchanged.
+"""
+
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+from apps.astrology.compatibility import ASPECTS, KEY_PLANETS, synastry_from_aspects
+from apps.numerology.compatibility import compatibility_from_harmonies
+
+COMPACT_VERSION = 1
+
+ASPECT_NAMES = tuple(ASPECTS)
+
+HARMONY_KEYS = ('life_path_harmony', 'soul_connection', 'expression_sync', 'personality_match')
+
+
+def compact_compatibility(compatibility: Dict, user1, user2) -> Dict:
+    """
+    Reduce a full compatibility dict to its compact form.
+
+    Args:
+        compatibility: calculate_full_compatibility(user1, user2) result
+        user1: First user instance
+        user2: Second user instance
+
+    Returns:
+        Compact dict, see the module docstring
+    """
+    astrology = compatibility['astrology']
+
+    return {
+        'v': COMPACT_VERSION,
+        'u': [
+            [user1.life_path, user1.sun_sign],
+            [user2.life_path, user2.sun_sign],
+        ],
+        'n': [compatibility['numerology'][key] for key in HARMONY_KEYS],
+        'a': None if astrology is None else [
+            [
+                KEY_PLANETS.index(aspect['planet1']),
+                KEY_PLANETS.index(aspect['planet2']),
+                ASPECT_NAMES.index(aspect['aspect']),
+                aspect['orb'],
+            ]
+            for aspect in astrology['aspects']
+        ],
+    }
+
+
+def expand_compatibility(data: Optional[Dict]) -> Optional[Dict]:
+    """
+    Rebuild the full compatibility dict from stored compatibility_data.
+
+    Args:
+        data: Stored value - compact, legacy full dict or None
+
+    Returns:
+        Full compatibility dict, or None when nothing was stored
+    """
+    from .services import build_full_compatibility
+
+    if not data or 'v' not in data:
+        return data
+
+    numerology = compatibility_from_harmonies(*data['n'])
+
+    astrology = None
+    if data['a'] is not None:
+        astrology = synastry_from_aspects([
+            {
+                'planet1': KEY_PLANETS[planet1],
+                'planet2': KEY_PLANETS[planet2],
+                'aspect': ASPECT_NAMES[aspect],
+                'orb': orb,
+            }
+            for planet1, planet2, aspect, orb in data['a']
+        ])
+
+    # Highlights only read these two fields of each user
+    user1, user2 = (
+        SimpleNamespace(life_path=life_path, sun_sign=sun_sign)
+        for life_path, sun_sign in data['u']
+    )
+
+    return build_full_compatibility(numerology, astrology, user1, user2)
@@ -0,0 +1,137 @@
+"""
+Pair compatibility cache.
+
+Full compatibility breakdowns are cached per unordered user pair plus each
+user's profile_version, so an entry is invalidated automatically as soon as
+either user's numerology or chart changes. A small in-process LRU sits in
+front of the shared Django cache backend.
+
+Entries are stored in (lower id, higher id) orientation. A lookup from the
+other side gets the same breakdown with the aspects and highlights flipped,
+exactly as calculate_full_compatibility would have produced them.
+"""
+
+import copy
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.astrology.compatibility import KEY_PLANETS, get_aspect_meaning
+
+
+class LocalLRU:
+    """Thread-safe in-process LRU mapping."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_local = LocalLRU(settings.COMPATIBILITY_CACHE_LOCAL_SIZE)
+
+
+def pair_key(user1, user2) -> str:
+    """
+    Cache key for an unordered pair at the users' current profile versions.
+
+    profile_version is only bumped by User.save() when one of
+    User.COMPATIBILITY_FIELDS changes. A QuerySet.update() of those fields
+    must bump it too (profile_version=F('profile_version') + 1), or entries
+    for the user are served stale until COMPATIBILITY_CACHE_TIMEOUT.
+    """
+    low, high = (user1, user2) if user1.id < user2.id else (user2, user1)
+    return f'compat:{low.id}:{low.profile_version}:{high.id}:{high.profile_version}'
+
+
+def get_cached_compatibility(user1, user2) -> Dict:
+    """
+    Full compatibility between two users, served from cache when possible.
+
+    Drop-in replacement for calculate_full_compatibility(user1, user2).
+    The returned dict is the caller's to modify.
+    """
+    from .services import calculate_full_compatibility
+
+    key = pair_key(user1, user2)
+    compatibility = _lookup(key)
+
+    if compatibility is None:
+        low, high = (user1, user2) if user1.id < user2.id else (user2, user1)
+        compatibility = calculate_full_compatibility(low, high)
+        cache.set(key, compatibility, settings.COMPATIBILITY_CACHE_TIMEOUT)
+        _local.set(key, compatibility)
+
+    return _for_caller(compatibility, user1, user2)
+
+
+def peek_cached_compatibility(user1, user2) -> Optional[Dict]:
+    """Cached compatibility for a pair, or None without calculating it."""
+    compatibility = _lookup(pair_key(user1, user2))
+    if compatibility is None:
+        return None
+    return _for_caller(compatibility, user1, user2)
+
+
+def _lookup(key: str) -> Optional[Dict]:
+    """Stored breakdown from the local LRU, then the shared cache."""
+    compatibility = _local.get(key)
+    if compatibility is None:
+        compatibility = cache.get(key)
+        if compatibility is not None:
+            _local.set(key, compatibility)
+    return compatibility
+
+
+def _for_caller(compatibility: Dict, user1, user2) -> Dict:
+    """Private copy of a stored breakdown, oriented from user1's side."""
+    compatibility = copy.deepcopy(compatibility)
+    if user1.id > user2.id:
+        compatibility = _reorient(compatibility, user1, user2)
+    return compatibility
+
+
+def _reorient(compatibility: Dict, user1, user2) -> Dict:
+    """Flip a (user2, user1) breakdown to read from user1's side."""
+    from .services import _generate_highlights
+
+    astrology = compatibility.get('astrology')
+    if astrology:
+        for aspect in astrology['aspects']:
+            aspect['planet1'], aspect['planet2'] = aspect['planet2'], aspect['planet1']
+            aspect['meaning'] = get_aspect_meaning(
+                aspect['planet1'],
+                aspect['planet2'],
+                aspect['aspect']
+            )
+        # calculate_synastry lists aspects in user1's planet order
+        astrology['aspects'].sort(key=lambda aspect: (
+            KEY_PLANETS.index(aspect['planet1']),
+            KEY_PLANETS.index(aspect['planet2']),
+        ))
+
+    compatibility['highlights'] = _generate_highlights(
+        compatibility['numerology'], astrology, user1, user2
+    )
+    return compatibility
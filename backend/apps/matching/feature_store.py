@@ -0,0 +1,570 @@
+"""
+Shared-memory columnar feature store for scan scoring.
+
+Holds the handful of columns a scan needs for every active, profile-complete
+user in NumPy arrays placed in POSIX shared memory, so all gunicorn workers on
+a host map one copy. Scans filter and score against the arrays and only load
+ORM rows for the final top-k.
+
+The store is kept fresh incrementally from User.updated_at: whichever worker
+first notices the refresh interval has passed applies the changed rows under a
+file lock. updated_at is stamped before its transaction commits, so each
+refresh re-reads SCAN_FEATURE_STORE_REFRESH_LAG_SECONDS before the watermark
+to pick up slow commits. Writes that bypass User.save() (QuerySet.update())
+must set updated_at themselves. Deleted users are swept out: every
+SCAN_FEATURE_STORE_SWEEP_SECONDS, and at the next refresh after a user is
+deleted, rows whose user is no longer active and profile-complete stop being
+live. Rows are only ever appended or overwritten in place, so readers never
+need the lock; a reader racing a writer may see a half-updated row, which is
+why callers re-check the final candidates against the database.
+
+Requires numpy (the `perf` extra); without it get_feature_store() returns None
+and scans fall back to SQL retrieval.
+"""
+
+import fcntl
+import logging
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+from apps.astrology.compatibility import ASPECTS, HARMONY_ASPECTS, KEY_PLANETS
+from apps.astrology.engine import ZODIAC_SIGNS
+from apps.numerology.compatibility import HARMONY_MATRIX, NUMBER_WEIGHTS, reduce_number
+
+from .geo import within_radius_mask
+from .parallel import get_thread_pool, merge_top_k, split, worker_count
+from .scoring import (
+    ASTROLOGY_WEIGHT,
+    NEUTRAL_ASTROLOGY_SCORE,
+    NUMEROLOGY_WEIGHT,
+    has_planets,
+)
+
+logger = logging.getLogger(__name__)
+
+# Bump when the column layout changes so old segments are never attached
+LAYOUT_VERSION = 2
+
+NUMBER_FIELDS = tuple(NUMBER_WEIGHTS)
+
+# (name, dtype, width) - planets holds one longitude per KEY_PLANETS entry
+COLUMNS = (
+    ('id', 'int64', 1),
+    ('live', 'uint8', 1),
+    ('gender', 'uint8', 1),
+    ('interested_in', 'uint8', 1),
+    ('birth_ordinal', 'int32', 1),
+    ('life_path', 'uint8', 1),
+    ('soul_urge', 'uint8', 1),
+    ('expression', 'uint8', 1),
+    ('personality', 'uint8', 1),
+    ('has_chart', 'uint8', 1),
+    ('planets', 'float64', len(KEY_PLANETS)),
+    ('latitude', 'float64', 1),  # current location, NaN when unknown
+    ('longitude', 'float64', 1),
+    ('sun_sign', 'int8', 1),
+)
+
+# Control block slots (int64 each)
+CTL_GENERATION = 0
+CTL_CAPACITY = 1
+CTL_ROWS = 2
+CTL_WATERMARK = 3
+CTL_DELETIONS = 4  # DELETIONS_KEY count as of the last sweep
+CTL_SWEPT_AT = 5  # wall clock of the last sweep, in microseconds
+CTL_SLOTS = 8
+
+# Users deleted so far, counted in the shared cache
+DELETIONS_KEY = 'feature-store:deletions'
+
+REFRESH_FIELDS = (
+    'id', 'is_active', 'is_profile_complete', 'gender_bit', 'interested_in_mask',
+    'birth_date', *NUMBER_FIELDS, 'chart_data',
+    'latitude', 'longitude', 'sun_sign', 'updated_at',
+)
+
+
+def _open_segment(name: str, size: int = 0) -> shared_memory.SharedMemory:
+    """
+    Create (size > 0) or attach a shared memory segment that outlives this process.
+
+    The multiprocessing resource tracker would otherwise unlink the segment
+    when the worker that created it exits.
+    """
+    create = size > 0
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, create=create, size=size, track=False)
+
+    segment = shared_memory.SharedMemory(name=name, create=create, size=size)
+    resource_tracker.unregister(segment._name, 'shared_memory')
+    return segment
+
+
+def _column_offsets(capacity: int) -> Tuple[Dict[str, int], int]:
+    """Byte offset of each column in a data segment, and the segment size."""
+    offsets = {}
+    offset = 0
+    for name, dtype, width in COLUMNS:
+        offsets[name] = offset
+        offset += capacity * width * np.dtype(dtype).itemsize
+        offset += -offset % 8  # keep every column 8-byte aligned
+    return offsets, offset
+
+
+def _to_micros(value: datetime) -> int:
+    return int(value.timestamp() * 1_000_000)
+
+
+def _from_micros(value: int) -> datetime:
+    return datetime.fromtimestamp(value / 1_000_000, tz=dt_timezone.utc)
+
+
+class FeatureStore:
+    """Process-local handle on the shared feature columns."""
+
+    def __init__(self, name: str):
+        self.name = f'{name}_v{LAYOUT_VERSION}'
+        self.lock_path = os.path.join(tempfile.gettempdir(), f'{self.name}.lock')
+        self.ctl_segment = None
+        self.ctl = None
+        self.segment = None
+        self.generation = -1
+        self.columns: Dict[str, 'np.ndarray'] = {}
+        self._row_index: Dict[int, int] = {}
+        self._indexed_rows = 0
+        self._checked_at = 0.0
+
+    # -- segments --------------------------------------------------------
+
+    def _attach_ctl(self) -> bool:
+        if self.ctl is not None:
+            return True
+        try:
+            self.ctl_segment = _open_segment(f'{self.name}_ctl')
+        except FileNotFoundError:
+            return False
+        self.ctl = np.ndarray((CTL_SLOTS,), dtype='int64', buffer=self.ctl_segment.buf)
+        return True
+
+    def _map_columns(self, segment, capacity: int) -> Dict[str, 'np.ndarray']:
+        offsets, _ = _column_offsets(capacity)
+        columns = {}
+        for name, dtype, width in COLUMNS:
+            shape = (capacity, width) if width > 1 else (capacity,)
+            columns[name] = np.ndarray(shape, dtype=dtype, buffer=segment.buf, offset=offsets[name])
+        return columns
+
+    def _attach_data(self):
+        """Attach the current generation's data segment if it changed."""
+        generation = int(self.ctl[CTL_GENERATION])
+        if generation == self.generation:
+            return
+
+        segment = _open_segment(f'{self.name}_{generation}')
+        self.columns = self._map_columns(segment, int(self.ctl[CTL_CAPACITY]))
+        if self.segment is not None:
+            self.segment.close()
+        self.segment = segment
+        self.generation = generation
+        self._row_index = {}
+        self._indexed_rows = 0
+
+    def _create(self, capacity: int):
+        """Create an empty first generation and its control block (lock held)."""
+        _, size = _column_offsets(capacity)
+        _open_segment(f'{self.name}_0', size).close()
+
+        self.ctl_segment = _open_segment(f'{self.name}_ctl', CTL_SLOTS * 8)
+        self.ctl = np.ndarray((CTL_SLOTS,), dtype='int64', buffer=self.ctl_segment.buf)
+        self.ctl[:] = 0
+        self.ctl[CTL_CAPACITY] = capacity
+
+    @property
+    def is_built(self) -> bool:
+        """Whether the initial build has finished (the watermark is set after it)."""
+        return self.ctl is not None and int(self.ctl[CTL_WATERMARK]) > 0
+
+    def _grow(self, needed: int):
+        """Copy the columns into a larger generation (lock held)."""
+        capacity = int(self.ctl[CTL_CAPACITY])
+        while capacity < needed:
+            capacity *= 2
+
+        generation = self.generation + 1
+        _, size = _column_offsets(capacity)
+        segment = _open_segment(f'{self.name}_{generation}', size)
+        columns = self._map_columns(segment, capacity)
+
+        rows = int(self.ctl[CTL_ROWS])
+        for name in columns:
+            columns[name][:rows] = self.columns[name][:rows]
+
+        old = self.segment
+        self.segment, self.columns, self.generation = segment, columns, generation
+        self.ctl[CTL_CAPACITY] = capacity
+        self.ctl[CTL_GENERATION] = generation
+
+        # Workers still mapping the old generation keep it until they reattach
+        old.close()
+        old.unlink()
+
+    # -- refresh ---------------------------------------------------------
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Apply user rows changed since the watermark.
+
+        Skips quietly if another worker holds the lock.
+
+        Returns:
+            True if this call applied changes
+        """
+        now = time.monotonic()
+        if not force and now - self._checked_at < settings.SCAN_FEATURE_STORE_REFRESH_SECONDS:
+            return False
+        self._checked_at = now
+
+        with open(self.lock_path, 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            try:
+                if not self._attach_ctl():
+                    self._create(settings.SCAN_FEATURE_STORE_CAPACITY)
+                self._attach_data()
+                swept = self._sweep()
+                return self._apply_changes() or swept
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _sync_row_index(self):
+        """Extend the id -> row map with rows appended by other workers."""
+        rows = int(self.ctl[CTL_ROWS])
+        ids = self.columns['id']
+        for row in range(self._indexed_rows, rows):
+            self._row_index[int(ids[row])] = row
+        self._indexed_rows = rows
+
+    def _sweep(self) -> bool:
+        """
+        Take rows of deleted or deactivated users out of scans (lock held).
+
+        Runs when a user was deleted since the last sweep, or every
+        SCAN_FEATURE_STORE_SWEEP_SECONDS to catch changes that bypassed
+        updated_at.
+
+        Returns:
+            True if any row stopped being live
+        """
+        from apps.users.models import User
+
+        deletions = cache.get(DELETIONS_KEY, 0)
+        now = _to_micros(timezone.now())
+        due = now - int(self.ctl[CTL_SWEPT_AT]) >= settings.SCAN_FEATURE_STORE_SWEEP_SECONDS * 1_000_000
+        if not due and deletions == int(self.ctl[CTL_DELETIONS]):
+            return False
+
+        # Recorded first: a deletion during the sweep triggers another one
+        self.ctl[CTL_DELETIONS] = deletions
+        self.ctl[CTL_SWEPT_AT] = now
+
+        rows = int(self.ctl[CTL_ROWS])
+        if not rows:
+            return False
+
+        live_ids = np.fromiter(
+            User.objects.filter(is_active=True, is_profile_complete=True)
+            .values_list('id', flat=True).iterator(chunk_size=10_000),
+            dtype='int64',
+        )
+        live = self.columns['live'][:rows]
+        gone = (live == 1) & ~np.isin(self.columns['id'][:rows], live_ids)
+        live[gone] = 0
+        return bool(gone.any())
+
+    def _apply_changes(self) -> bool:
+        from apps.users.models import User
+
+        watermark = int(self.ctl[CTL_WATERMARK])
+        queryset = User.objects.all()
+        if watermark:
+            # Rows are stamped before their transaction commits: re-read a
+            # window before the watermark so a slow commit is not skipped
+            lag = settings.SCAN_FEATURE_STORE_REFRESH_LAG_SECONDS * 1_000_000
+            queryset = queryset.filter(updated_at__gte=_from_micros(watermark - lag))
+        else:
+            queryset = queryset.filter(is_active=True, is_profile_complete=True)
+
+        self._sync_row_index()
+        changed = False
+        batch: List[tuple] = []
+        for row in queryset.order_by('updated_at').values_list(*REFRESH_FIELDS).iterator(chunk_size=2000):
+            batch.append(row)
+            if len(batch) >= 2000:
+                watermark = max(watermark, self._write_rows(batch))
+                batch = []
+                changed = True
+        if batch:
+            watermark = max(watermark, self._write_rows(batch))
+            changed = True
+
+        self.ctl[CTL_WATERMARK] = watermark
+        return changed
+
+    def _write_rows(self, batch: Sequence[tuple]) -> int:
+        """Upsert a batch of REFRESH_FIELDS rows; returns the batch watermark."""
+        rows = int(self.ctl[CTL_ROWS])
+        targets = []
+        values = {name: [] for name, _, _ in COLUMNS}
+        watermark = 0
+
+        for record in batch:
+            fields = dict(zip(REFRESH_FIELDS, record))
+            watermark = max(watermark, _to_micros(fields['updated_at']))
+            live = fields['is_active'] and fields['is_profile_complete']
+
+            row = self._row_index.get(fields['id'])
+            if row is None:
+                if not live:
+                    continue
+                row = rows
+                rows += 1
+                self._row_index[fields['id']] = row
+            targets.append(row)
+
+            planets = (fields['chart_data'] or {}).get('planets') or {}
+            values['id'].append(fields['id'])
+            values['live'].append(1 if live else 0)
+            values['gender'].append(fields['gender_bit'])
+            values['interested_in'].append(fields['interested_in_mask'])
+            values['birth_ordinal'].append(fields['birth_date'].toordinal())
+            for field in NUMBER_FIELDS:
+                values[field].append(fields[field])
+            values['has_chart'].append(1 if has_planets(fields['chart_data']) else 0)
+            values['planets'].append([
+                (planets.get(planet) or {}).get('longitude', math.nan) for planet in KEY_PLANETS
+            ])
+            values['latitude'].append(_or_nan(fields['latitude']))
+            values['longitude'].append(_or_nan(fields['longitude']))
+            values['sun_sign'].append(
+                ZODIAC_SIGNS.index(fields['sun_sign']) if fields['sun_sign'] in ZODIAC_SIGNS else -1
+            )
+
+        if rows > int(self.ctl[CTL_CAPACITY]):
+            self._grow(rows)
+
+        if targets:
+            index = np.asarray(targets, dtype='int64')
+            for name, dtype, _ in COLUMNS:
+                self.columns[name][index] = np.asarray(values[name], dtype=dtype)
+
+        # Publish appended rows only after their columns are written
+        self.ctl[CTL_ROWS] = rows
+        self._indexed_rows = rows
+        return watermark
+
+    # -- queries ---------------------------------------------------------
+
+    def rank(
+        self,
+        user,
+        k: int,
+        exclude_ids: Sequence[int] = (),
+        birth_date_range: Optional[Tuple] = None,
+        distance_km: Optional[float] = None,
+    ) -> List[Tuple[int, int]]:
+        """
+        Score every eligible user against `user` and return the best k.
+
+        Args:
+            user: The requesting user
+            k: Number of results wanted
+            exclude_ids: User ids to leave out (e.g. already resonated)
+            birth_date_range: Optional (min_birth_date, max_birth_date)
+            distance_km: Optional radius around the user's current location
+
+        Returns:
+            List of (user_id, score), best first
+        """
+        rows = int(self.ctl[CTL_ROWS])
+        cols = {name: column[:rows] for name, column in self.columns.items()}
+
+        mask = cols['live'].astype(bool) & (cols['id'] != user.id)
+        if user.interested_in_mask:
+            mask &= (cols['gender'] & user.interested_in_mask) != 0
+        if user.gender_bit:
+            # interested_in 0 means open to all
+            mask &= (cols['interested_in'] == 0) | ((cols['interested_in'] & user.gender_bit) != 0)
+        if birth_date_range:
+            min_birth_date, max_birth_date = birth_date_range
+            mask &= cols['birth_ordinal'] >= min_birth_date.toordinal()
+            mask &= cols['birth_ordinal'] <= max_birth_date.toordinal()
+        if len(exclude_ids):
+            mask &= ~np.isin(cols['id'], np.asarray(exclude_ids, dtype='int64'))
+        if distance_km is not None:
+            # Exact distance only for rows that passed the cheaper filters
+            candidates = np.flatnonzero(mask)
+            mask[candidates] = within_radius_mask(
+                user.latitude, user.longitude, distance_km,
+                cols['latitude'][candidates], cols['longitude'][candidates],
+            )
+
+        rows_idx = np.flatnonzero(mask)
+        if not len(rows_idx) or k <= 0:
+            return []
+
+        return rank_rows(user, cols, rows_idx, k)
+
+
+def _or_nan(value) -> float:
+    return math.nan if value is None else value
+
+
+# -- vectorized scoring ------------------------------------------------------
+
+def _harmony_table():
+    """HARMONY_MATRIX as a lookup array indexed by raw numbers 0-33."""
+    table = np.full((34, 34), 50, dtype='int64')
+    for a in range(1, 34):
+        for b in range(1, 34):
+            table[a, b] = HARMONY_MATRIX.get(reduce_number(a), {}).get(reduce_number(b), 50)
+    return table
+
+
+_HARMONY = None
+
+
+def score_rows(user, cols: Dict[str, 'np.ndarray'], rows_idx: 'np.ndarray') -> 'np.ndarray':
+    """
+    Overall compatibility of `user` with the given store rows.
+
+    Mirrors calculate_full_compatibility()'s overall_score exactly, without
+    building any of the breakdown.
+    """
+    global _HARMONY
+    if _HARMONY is None:
+        _HARMONY = _harmony_table()
+
+    # Numerology: weighted harmony, summed in the same order as
+    # calculate_compatibility() so float rounding matches
+    numerology = None
+    for field, weight in NUMBER_WEIGHTS.items():
+        harmony = _HARMONY[getattr(user, field), cols[field][rows_idx]] * weight
+        numerology = harmony if numerology is None else numerology + harmony
+    numerology = np.trunc(numerology)
+
+    astrology = np.full(len(rows_idx), NEUTRAL_ASTROLOGY_SCORE, dtype='float64')
+    if has_planets(user.chart_data):
+        planets = user.chart_data['planets']
+        candidate_planets = cols['planets'][rows_idx]
+        harmony_count = np.zeros(len(rows_idx), dtype='int64')
+        tension_count = np.zeros(len(rows_idx), dtype='int64')
+
+        for planet in KEY_PLANETS:
+            position = planets.get(planet)
+            if position is None:
+                continue
+            diff = np.abs(position['longitude'] - candidate_planets)
+            diff = np.where(diff > 180, 360 - diff, diff)
+            for aspect_name, (angle, max_orb) in ASPECTS.items():
+                hit = (np.abs(diff - angle) <= max_orb).sum(axis=1)
+                if aspect_name in HARMONY_ASPECTS:
+                    harmony_count += hit
+                else:
+                    tension_count += hit
+
+        synastry = np.clip(50 + harmony_count * 10 - tension_count * 5, 0, 100)
+        astrology = np.where(cols['has_chart'][rows_idx].astype(bool), synastry, astrology)
+
+    return np.trunc(numerology * NUMEROLOGY_WEIGHT + astrology * ASTROLOGY_WEIGHT).astype('int64')
+
+
+def top_k(ids: 'np.ndarray', scores: 'np.ndarray', k: int) -> List[Tuple[int, int]]:
+    """Best k (id, score) pairs, ties broken by lower id."""
+    if len(scores) > k:
+        # Keep everything tied with the k-th score so the tie-break is stable
+        kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+        keep = np.flatnonzero(scores >= kth)
+        ids, scores = ids[keep], scores[keep]
+    order = np.lexsort((ids, -scores))[:k]
+    return [(int(ids[i]), int(scores[i])) for i in order]
+
+
+def rank_rows(user, cols: Dict[str, 'np.ndarray'], rows_idx: 'np.ndarray', k: int) -> List[Tuple[int, int]]:
+    """
+    Score store rows and return the best k (id, score) pairs.
+
+    Large pools are split across the scoring thread pool; each chunk keeps its
+    own top-k and the partial results are merged.
+    """
+    def rank_chunk(chunk):
+        return top_k(cols['id'][chunk], score_rows(user, cols, chunk), k)
+
+    workers = worker_count()
+    if workers <= 1 or len(rows_idx) < settings.SCAN_PARALLEL_MIN_ROWS:
+        return rank_chunk(rows_idx)
+
+    partials = get_thread_pool().map(rank_chunk, split(rows_idx, workers))
+    return merge_top_k(partials, k, key=lambda item: (item[1], -item[0]))
+
+
+_store: Optional[FeatureStore] = None
+_store_lock = threading.Lock()
+
+
+def note_user_deleted():
+    """Have every host's store sweep deleted users out at its next refresh."""
+    cache.add(DELETIONS_KEY, 0, timeout=None)
+    try:
+        cache.incr(DELETIONS_KEY)
+    except ValueError:  # evicted in between
+        cache.set(DELETIONS_KEY, 1, timeout=None)
+
+
+def get_feature_store() -> Optional[FeatureStore]:
+    """
+    Return this process's feature store handle, refreshed if due.
+
+    Returns None when the store is disabled, numpy is missing, or the store
+    is still being built by another worker.
+    """
+    global _store
+
+    if not settings.SCAN_FEATURE_STORE_ENABLED or not NUMPY_AVAILABLE:
+        return None
+
+    with _store_lock:
+        if _store is None:
+            _store = FeatureStore(settings.SCAN_FEATURE_STORE_NAME)
+        store = _store
+
+        try:
+            store.refresh()
+            if not store._attach_ctl() or not store.is_built:
+                return None
+            store._attach_data()
+        except Exception:
+            logger.exception('Scan feature store unavailable, falling back to SQL retrieval')
+            return None
+
+    return store
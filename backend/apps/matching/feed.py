@@ -0,0 +1,237 @@
+"""
+Per-user scan feeds.
+
+A user's feed (FeedEntry rows) holds their best scored candidates, so a scan
+only pops the top of it instead of ranking the whole pool. Feeds are
+maintained in the background:
+- rebuilt when the user's own scan or compatibility fields change, and when
+  a scan leaves fewer than SCAN_FEED_LOW_WATER entries
+- extended incrementally when another user becomes eligible (completes
+  their profile) or changes the fields other users' scans filter on
+
+Entries can go stale between refreshes, so popped entries are re-checked
+against the eligibility query before they are returned. Scans with explicit
+filters bypass the feed.
+
+Background work runs on a small thread pool once the triggering transaction
+commits; `manage.py refresh_feeds` rebuilds feeds in bulk.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, Min
+
+from .geo import filter_within, is_within, search_radius
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_pending = set()  # (task name, user id) queued and not started yet
+_lock = threading.Lock()
+
+
+def feed_enabled() -> bool:
+    return settings.SCAN_FEED_ENABLED
+
+
+# -- background scheduling ---------------------------------------------------
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.SCAN_FEED_WORKERS,
+                thread_name_prefix='scan-feed',
+            )
+    return _executor
+
+
+def _submit(task, user_id: int):
+    """Queue task(user_id) unless the same call is already waiting."""
+    key = (task.__name__, user_id)
+    with _lock:
+        if key in _pending:
+            return
+        _pending.add(key)
+
+    def run():
+        with _lock:
+            _pending.discard(key)
+        try:
+            task(user_id)
+        except Exception:
+            logger.exception('Scan feed task %s failed for user %s', task.__name__, user_id)
+        finally:
+            connections.close_all()  # this thread's connections only
+
+    _get_executor().submit(run)
+
+
+def schedule_rebuild(user_id: int):
+    """Rebuild a user's feed in the background after the current transaction."""
+    transaction.on_commit(lambda: _submit(_rebuild_task, user_id))
+
+
+def schedule_offer(user_id: int):
+    """Offer a user to other users' feeds in the background after the current transaction."""
+    transaction.on_commit(lambda: _submit(_offer_task, user_id))
+
+
+def _rebuild_task(user_id: int):
+    from apps.users.models import User
+
+    user = User.objects.filter(id=user_id, is_active=True, is_profile_complete=True).first()
+    if user is not None:
+        rebuild_feed(user)
+
+
+def _offer_task(user_id: int):
+    from apps.users.models import User
+
+    candidate = User.objects.filter(id=user_id).first()
+    if candidate is not None:
+        offer_candidate(candidate)
+
+
+# -- feed maintenance --------------------------------------------------------
+
+def rebuild_feed(user) -> int:
+    """
+    Replace a user's feed with their current best SCAN_FEED_SIZE candidates.
+
+    Returns:
+        Number of entries written
+    """
+    from .models import FeedEntry
+    from .services import rank_scan_candidates
+
+    ranked = rank_scan_candidates(user, settings.SCAN_FEED_SIZE)
+
+    with transaction.atomic():
+        FeedEntry.objects.filter(user=user).delete()
+        FeedEntry.objects.bulk_create([
+            FeedEntry(user=user, candidate=candidate, score=score)
+            for score, candidate in ranked
+        ])
+
+    return len(ranked)
+
+
+def offer_candidate(candidate) -> int:
+    """
+    Add a user to the existing feeds they now qualify for.
+
+    Only feeds that are not full, or whose lowest entry the candidate beats,
+    take the new entry.
+
+    Returns:
+        Number of feeds the candidate was added to
+    """
+    from apps.users.models import GENDER_BITS, User, masks_accepting
+
+    from .models import FeedEntry, Resonance
+    from .services import calculate_compatibility_score
+
+    if not (candidate.is_active and candidate.is_profile_complete):
+        return 0
+
+    owners = User.objects.filter(
+        is_active=True,
+        is_profile_complete=True,
+        id__in=FeedEntry.objects.values('user_id'),
+    ).exclude(
+        id=candidate.id
+    ).exclude(
+        id__in=Resonance.objects.filter(to_user=candidate).values('from_user_id')
+    )
+
+    # Two-way gender check, seen from the candidate's side
+    if candidate.interested_in_mask:
+        owners = owners.filter(gender_bit__in=[
+            bit for bit in GENDER_BITS.values() if candidate.interested_in_mask & bit
+        ])
+    if candidate.gender_bit:
+        owners = owners.filter(interested_in_mask__in=masks_accepting(candidate.gender_bit))
+
+    feeds = {
+        row['user_id']: (row['lowest'], row['size'])
+        for row in FeedEntry.objects.filter(user__in=owners).values('user_id').annotate(
+            lowest=Min('score'),
+            size=Count('id'),
+        )
+    }
+
+    entries = []
+    for owner in owners.iterator(chunk_size=500):
+        radius_km = search_radius(owner)
+        if radius_km is not None and not is_within(owner, candidate, radius_km):
+            continue
+
+        score = calculate_compatibility_score(owner, candidate)
+        lowest, size = feeds.get(owner.id, (None, 0))
+        if size >= settings.SCAN_FEED_SIZE and score <= lowest:
+            continue
+
+        entries.append(FeedEntry(user=owner, candidate=candidate, score=score))
+
+    FeedEntry.objects.bulk_create(entries, batch_size=1000, ignore_conflicts=True)
+    return len(entries)
+
+
+# -- scans -------------------------------------------------------------------
+
+def pop_feed(user, limit: int, exclude: Iterable[int] = ()) -> Tuple[List[Tuple[int, Any]], int]:
+    """
+    Take up to `limit` still-eligible candidates off the top of a user's feed.
+
+    Entries for `exclude` (e.g. candidates a scan session already listed) are
+    dropped like stale ones. Schedules a rebuild when the feed runs low.
+
+    Returns:
+        ([(score, candidate)] best first, entries left in the feed)
+    """
+    from .models import FeedEntry
+    from .services import _candidate_queryset, _resonated_among
+
+    results: List[Tuple[int, Any]] = []
+    radius_km = search_radius(user)
+    exclude = set(exclude)
+
+    while len(results) < limit:
+        with transaction.atomic():
+            entries = list(
+                FeedEntry.objects.filter(user=user)
+                .select_for_update(skip_locked=True)
+                .order_by('-score', 'id')[:limit - len(results)]
+            )
+            FeedEntry.objects.filter(id__in=[entry.id for entry in entries]).delete()
+
+        if not entries:
+            break
+
+        # Drop entries that went stale since the feed was filled
+        ids = [entry.candidate_id for entry in entries if entry.candidate_id not in exclude]
+        candidates = _candidate_queryset(user).in_bulk(ids)
+        for user_id in _resonated_among(user, ids):
+            candidates.pop(user_id, None)
+        if radius_km is not None:
+            kept = filter_within(user, list(candidates.values()), radius_km)
+            candidates = {candidate.id: candidate for candidate in kept}
+
+        results.extend(
+            (entry.score, candidates[entry.candidate_id])
+            for entry in entries
+            if entry.candidate_id in candidates
+        )
+
+    remaining = FeedEntry.objects.filter(user=user).count()
+    if remaining < settings.SCAN_FEED_LOW_WATER:
+        schedule_rebuild(user.id)
+
+    return results, remaining
@@ -0,0 +1,155 @@
+"""
+Distance filtering for scans.
+
+Current locations are bucketed into a fixed latitude/longitude grid
+(User.geo_cell, indexed). A search circle becomes one run of cells per grid
+row, and runs that touch are merged, so the database answers the coarse filter
+with a few index range scans on SQLite and Postgres alike. The grid
+over-covers the circle, so the short list is then checked exactly with the
+haversine distance.
+
+Users without a location are never filtered out by distance.
+"""
+
+import math
+from typing import List, Optional, Tuple
+
+from django.db.models import Q
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+from apps.users.models import GEO_CELL_DEGREES, GEO_GRID_COLUMNS, GEO_GRID_ROWS, geo_cell
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def search_radius(user) -> Optional[float]:
+    """Distance limit for a user's scans, or None when it does not apply."""
+    if user.latitude is None or user.longitude is None:
+        return None
+    return user.distance_km_preference or None
+
+
+def cell_ranges(latitude: float, longitude: float, radius_km: float) -> List[Tuple[int, int]]:
+    """
+    Inclusive geo_cell ranges covering a circle.
+
+    Args:
+        latitude, longitude: Circle center in degrees
+        radius_km: Circle radius
+
+    Returns:
+        Sorted, non-overlapping (first_cell, last_cell) ranges
+    """
+    delta = radius_km / EARTH_RADIUS_KM  # angular radius
+    last_cell = GEO_GRID_ROWS * GEO_GRID_COLUMNS - 1
+    if delta >= math.pi:
+        return [(0, last_cell)]
+
+    min_latitude = latitude - math.degrees(delta)
+    max_latitude = latitude + math.degrees(delta)
+    first_row = _row(max(min_latitude, -90))
+    last_row = _row(min(max_latitude, 90))
+
+    # Circles reaching a pole cover every longitude
+    if min_latitude <= -90 or max_latitude >= 90:
+        columns = [(0, GEO_GRID_COLUMNS - 1)]
+    else:
+        # Widest longitude extent of the circle
+        span = math.degrees(math.asin(math.sin(delta) / math.cos(math.radians(latitude))))
+        if 2 * span >= 360 - GEO_CELL_DEGREES:
+            columns = [(0, GEO_GRID_COLUMNS - 1)]
+        else:
+            first_column = _column(longitude - span)
+            last_column = _column(longitude + span)
+            if first_column <= last_column:
+                columns = [(first_column, last_column)]
+            else:  # wraps around the antimeridian
+                columns = [(0, last_column), (first_column, GEO_GRID_COLUMNS - 1)]
+
+    ranges: List[Tuple[int, int]] = []
+    for row in range(first_row, last_row + 1):
+        for first_column, last_column in columns:
+            first = row * GEO_GRID_COLUMNS + first_column
+            last = row * GEO_GRID_COLUMNS + last_column
+            if ranges and first <= ranges[-1][1] + 1:
+                ranges[-1] = (ranges[-1][0], last)
+            else:
+                ranges.append((first, last))
+    return ranges
+
+
+def _row(latitude: float) -> int:
+    return geo_cell(latitude, 0) // GEO_GRID_COLUMNS
+
+
+def _column(longitude: float) -> int:
+    return geo_cell(0, longitude) % GEO_GRID_COLUMNS
+
+
+def cell_filter(latitude: float, longitude: float, radius_km: float) -> Q:
+    """Coarse User filter for a circle; keeps users without a location."""
+    condition = Q(geo_cell__isnull=True)
+    for first, last in cell_ranges(latitude, longitude, radius_km):
+        condition |= Q(geo_cell__range=(first, last))
+    return condition
+
+
+def haversine_km(latitude1, longitude1, latitude2, longitude2) -> float:
+    """Great-circle distance between two points, in km."""
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(longitude2 - longitude1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def within_radius_mask(latitude, longitude, radius_km, latitudes, longitudes):
+    """
+    Vectorized exact distance check (needs numpy).
+
+    Args:
+        latitude, longitude: Circle center in degrees
+        radius_km: Circle radius
+        latitudes, longitudes: Candidate arrays; NaN means no location
+
+    Returns:
+        Boolean array, True for candidates inside the circle or without a location
+    """
+    phi1 = math.radians(latitude)
+    phi2 = np.radians(latitudes)
+    a = (
+        np.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * np.cos(phi2) * np.sin(np.radians(longitudes - longitude) / 2) ** 2
+    )
+    distance = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+    return (distance <= radius_km) | np.isnan(latitudes) | np.isnan(longitudes)
+
+
+def is_within(user, candidate, radius_km: float) -> bool:
+    """Exact distance check for one candidate."""
+    if candidate.latitude is None or candidate.longitude is None:
+        return True
+    distance = haversine_km(user.latitude, user.longitude, candidate.latitude, candidate.longitude)
+    return distance <= radius_km
+
+
+def filter_within(user, candidates: List, radius_km: float) -> List:
+    """Exact distance check on a short list of candidates, keeping their order."""
+    if not NUMPY_AVAILABLE:
+        return [candidate for candidate in candidates if is_within(user, candidate, radius_km)]
+
+    latitudes = np.array([_or_nan(candidate.latitude) for candidate in candidates], dtype='float64')
+    longitudes = np.array([_or_nan(candidate.longitude) for candidate in candidates], dtype='float64')
+    keep = within_radius_mask(user.latitude, user.longitude, radius_km, latitudes, longitudes)
+    return [candidate for candidate, kept in zip(candidates, keep) if kept]
+
+
+def _or_nan(value) -> float:
+    return math.nan if value is None else value
@@ -0,0 +1,123 @@
+"""
+"Likes you" inbox.
+
+IncomingLike rows mirror the resonates their target has not responded to,
+so the inbox is a plain indexed range read instead of an anti-join against
+everything the user has responded to. Resonance writes call sync_inbox();
+deleted resonances drop their row by cascade and may bring back the other
+side's like (restore_incoming_like).
+
+Inbox sizes are cached for badge display and dropped whenever an inbox
+changes.
+"""
+
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _count_key(user_id: int) -> str:
+    return f'inbox-count:{user_id}'
+
+
+def _forget_counts(user_ids: Iterable[int]):
+    cache.delete_many([_count_key(user_id) for user_id in user_ids])
+
+
+def forget_inbox_count(user_id: int):
+    """Drop a cached inbox size after removing rows outside sync_inbox()."""
+    _forget_counts([user_id])
+
+
+def inbox_count(user_id: int) -> int:
+    """Number of pending incoming likes, cached."""
+    from .models import IncomingLike
+
+    count = cache.get(_count_key(user_id))
+    if count is None:
+        count = IncomingLike.objects.filter(user_id=user_id).count()
+        cache.set(_count_key(user_id), count, settings.INBOX_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def sync_inbox(from_user_id: int, to_user_ids: Iterable[int]):
+    """
+    Update inboxes after a user's resonances to `to_user_ids` were written.
+
+    - the targets' likes leave the sender's inbox: the sender has responded
+    - resonates appear in the targets' inboxes, unless the target has
+      already responded to the sender
+    - anything else leaves the targets' inboxes
+    """
+    from .models import IncomingLike, Resonance
+
+    to_user_ids = list(to_user_ids)
+    if not to_user_ids:
+        return
+
+    answered = IncomingLike.objects.filter(user_id=from_user_id, from_user_id__in=to_user_ids).delete()[0]
+    if answered:
+        _forget_counts([from_user_id])
+
+    withdrawn = IncomingLike.objects.filter(
+        from_user_id=from_user_id,
+        user_id__in=to_user_ids,
+    ).exclude(resonance__action='resonate')
+    withdrawn_from = list(withdrawn.values_list('user_id', flat=True))
+    if withdrawn_from:
+        withdrawn.delete()
+
+    pending = Resonance.objects.filter(
+        from_user_id=from_user_id,
+        to_user_id__in=to_user_ids,
+        action='resonate',
+    ).exclude(
+        to_user_id__in=Resonance.objects.filter(
+            from_user_id__in=to_user_ids,
+            to_user_id=from_user_id,
+        ).values('from_user_id')
+    )
+    likes = [
+        IncomingLike(
+            resonance_id=resonance_id,
+            user_id=to_user_id,
+            from_user_id=from_user_id,
+            compatibility_score=score,
+            created_at=created_at,
+        )
+        for resonance_id, to_user_id, score, created_at in pending.values_list(
+            'id', 'to_user_id', 'compatibility_score', 'created_at'
+        )
+    ]
+    IncomingLike.objects.bulk_create(likes, batch_size=1000, ignore_conflicts=True)
+
+    _forget_counts(withdrawn_from + [like.user_id for like in likes])
+
+
+def restore_incoming_like(resonance):
+    """
+    Undo a deleted resonance's effect on both inboxes.
+
+    Its own like left the target's inbox by cascade. If the target had
+    resonated back, that like is pending again in the sender's inbox.
+    """
+    from .models import IncomingLike, Resonance
+
+    reverse = Resonance.objects.filter(
+        from_user_id=resonance.to_user_id,
+        to_user_id=resonance.from_user_id,
+        action='resonate',
+    ).first()
+    if reverse is not None:
+        IncomingLike.objects.bulk_create([
+            IncomingLike(
+                resonance=reverse,
+                user_id=reverse.to_user_id,
+                from_user_id=reverse.from_user_id,
+                compatibility_score=reverse.compatibility_score,
+                created_at=reverse.created_at,
+            )
+        ], ignore_conflicts=True)
+
+    _forget_counts([resonance.from_user_id, resonance.to_user_id])
@@ -0,0 +1,118 @@
+"""
+Render and parse times of real scan and match payloads per renderer.
+
+    python manage.py benchmark_renderers                # first user with matches
+    python manage.py benchmark_renderers --user 42 --rounds 20
+
+Builds the payloads the scan and match endpoints would return for the user,
+then times DRF's JSONRenderer, ORJSONRenderer and MessagePackRenderer (when
+installed) on them, and checks that ORJSONRenderer matches DRF byte for byte.
+"""
+
+import json
+import time
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from rest_framework.renderers import JSONRenderer
+
+from apps.matching.compat_cache import get_cached_compatibility
+from apps.matching.models import Match
+from apps.matching.scan_session import scan_token
+from apps.matching.serializers import MatchDetailSerializer, ScanResultSerializer
+from apps.matching.services import rank_scan_candidates
+from apps.users.models import User
+from core.renderers import (
+    MSGPACK_AVAILABLE,
+    ORJSON_AVAILABLE,
+    MessagePackRenderer,
+    ORJSONRenderer,
+)
+
+if ORJSON_AVAILABLE:
+    import orjson
+
+if MSGPACK_AVAILABLE:
+    import msgpack
+
+
+def _best(function, rounds: int) -> float:
+    """Best wall time of `rounds` calls, in milliseconds."""
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+class Command(BaseCommand):
+    help = 'Benchmark JSON and MessagePack rendering on scan and match payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='User whose payloads are rendered')
+        parser.add_argument('--scan-size', type=int, default=50, help='Profiles in the scan payload')
+        parser.add_argument('--rounds', type=int, default=10, help='Rounds per case (best is reported)')
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_active=True, is_profile_complete=True)
+        if options['user']:
+            user = users.filter(id=options['user']).first()
+        else:
+            user = users.filter(
+                Q(matches_as_user1__isnull=False) | Q(matches_as_user2__isnull=False)
+            ).first() or users.first()
+        if user is None:
+            raise CommandError('No eligible user to build payloads for')
+
+        payloads = {
+            'scan': self._scan_payload(user, options['scan_size']),
+            'matches': self._match_payload(user),
+        }
+
+        renderers = [('drf json', JSONRenderer(), json.loads)]
+        if ORJSON_AVAILABLE:
+            renderers.append(('orjson', ORJSONRenderer(), orjson.loads))
+        if MSGPACK_AVAILABLE:
+            renderers.append(('msgpack', MessagePackRenderer(), msgpack.unpackb))
+
+        for name, payload in payloads.items():
+            self.stdout.write(f'{name} payload (user {user.id})')
+            reference = JSONRenderer().render(payload)
+
+            for label, renderer, parse in renderers:
+                body = renderer.render(payload)
+                if isinstance(renderer, ORJSONRenderer) and body != reference:
+                    raise CommandError(f'{name}: orjson output differs from DRF output')
+
+                render_ms = _best(lambda: renderer.render(payload), options['rounds'])
+                parse_ms = _best(lambda: parse(body), options['rounds'])
+                self.stdout.write(
+                    f'  {label:<9} {len(body):>9} bytes   '
+                    f'render {render_ms:8.3f} ms   parse {parse_ms:8.3f} ms'
+                )
+
+    def _scan_payload(self, user, size: int):
+        results = []
+        for score, candidate in rank_scan_candidates(user, size):
+            results.append({
+                'user': candidate,
+                'compatibility': get_cached_compatibility(user, candidate),
+                'scan_token': scan_token(user, candidate, score),
+            })
+        return {
+            'profiles': ScanResultSerializer(results, many=True).data,
+            'count': len(results),
+            'has_more': False,
+            'cursor': None,
+            'partial': False,
+        }
+
+    def _match_payload(self, user):
+        matches = Match.objects.filter(
+            Q(user1=user) | Q(user2=user)
+        ).select_related('user1', 'user2').order_by('-created_at')[:20]
+        context = {'request': SimpleNamespace(user=user)}
+        return {'results': MatchDetailSerializer(matches, many=True, context=context).data}
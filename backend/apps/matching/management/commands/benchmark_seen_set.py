@@ -0,0 +1,118 @@
+"""
+Cost of per-user seen-sets at 10k+ swipes.
+
+    python manage.py benchmark_seen_set
+    python manage.py benchmark_seen_set --swipes 50000 --threads 16
+
+Times loading a cached set, membership checks and mark_seen against a
+plain Python set, then has several threads mark_seen the same user at
+once and checks that no id is lost. Runs on the configured cache only;
+the database is not touched.
+"""
+
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.matching.seen_set import SeenSet, _key, forget_seen_set, get_seen_set, mark_seen
+
+# Seen-set owner for the run; far above real user ids
+BENCHMARK_USER_ID = 2 ** 31 - 1
+
+
+def _best(function, rounds: int) -> float:
+    """Best wall time of `rounds` calls, in milliseconds."""
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+class Command(BaseCommand):
+    help = 'Benchmark seen-set load, membership and concurrent mark_seen'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--swipes', type=int, default=10000, help='Ids in the seen-set')
+        parser.add_argument('--lookups', type=int, default=10000, help='Membership checks per round')
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent mark_seen writers')
+        parser.add_argument('--rounds', type=int, default=5, help='Rounds per case (best is reported)')
+
+    def handle(self, *args, **options):
+        user_id = BENCHMARK_USER_ID
+        rounds = options['rounds']
+        pool = random.Random(0).sample(range(1, 10 * options['swipes']), options['swipes'])
+        probes = random.Random(1).choices(range(1, 10 * options['swipes']), k=options['lookups'])
+
+        seen = SeenSet.from_ids(pool)
+        plain = set(pool)
+        cache.set(_key(user_id), seen.ids.tobytes(), settings.SEEN_SET_CACHE_TIMEOUT)
+
+        try:
+            self.stdout.write(
+                f'{len(seen)} ids: {len(seen.ids.tobytes()) / 1024:.1f} KB cached'
+            )
+            self._row('load from cache', _best(lambda: get_seen_set(user_id), rounds))
+            self._row(
+                f'{len(probes)} lookups',
+                _best(lambda: sum(probe in seen for probe in probes), rounds),
+                _best(lambda: sum(probe in plain for probe in probes), rounds),
+            )
+            if [probe in seen for probe in probes] != [probe in plain for probe in probes]:
+                raise CommandError('SeenSet membership differs from a set')
+
+            next_ids = iter(range(10 * options['swipes'], 20 * options['swipes']))
+            self._row('mark_seen (one id)', _best(lambda: mark_seen(user_id, next(next_ids)), rounds))
+
+            self._check_concurrent(user_id, options['threads'])
+        finally:
+            forget_seen_set(user_id)
+
+    def _row(self, name: str, seen_ms: float, set_ms: float = None):
+        line = f'{name:<22} seen-set {seen_ms:8.3f} ms'
+        if set_ms is not None:
+            line += f'   set {set_ms:8.3f} ms'
+        self.stdout.write(line)
+
+    def _check_concurrent(self, user_id: int, threads: int):
+        """Concurrent writers to one user's set must all land."""
+        # Past 2**32, as user ids are 64-bit
+        base = 2 ** 32
+        per_thread = 50
+        barrier = threading.Barrier(threads)
+
+        def swipe(index: int):
+            barrier.wait()
+            for offset in range(per_thread):
+                mark_seen(user_id, base + index * per_thread + offset)
+
+        workers = [threading.Thread(target=swipe, args=(index,)) for index in range(threads)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = (time.perf_counter() - start) * 1000
+
+        data = cache.get(_key(user_id))
+        if data is None:
+            # A writer gave up on the lock and dropped the set: safe, but slow
+            raise CommandError('Seen-set was dropped under contention')
+        seen = SeenSet.from_bytes(data)
+        lost = [
+            to_user_id
+            for to_user_id in range(base, base + threads * per_thread)
+            if to_user_id not in seen
+        ]
+        if lost:
+            raise CommandError(f'{len(lost)} of {threads * per_thread} concurrent ids lost')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{threads} threads x {per_thread} mark_seen: no ids lost ({elapsed:.1f} ms)'
+        ))
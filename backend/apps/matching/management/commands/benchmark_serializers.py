@@ -0,0 +1,116 @@
+"""
+Per-item cost of the hot read serializers, with and without FAST_SERIALIZERS.
+
+    python manage.py benchmark_serializers
+    python manage.py benchmark_serializers --items 2000 --rounds 5
+
+Runs on unsaved in-memory objects, so no database is touched. Also checks
+that both paths render byte-identical JSON.
+"""
+
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from apps.matching.models import Match
+from apps.matching.serializers import ProfileCardSerializer
+from apps.messaging.models import Message
+from apps.messaging.serializers import MessageSenderSerializer, MessageSerializer
+from apps.users.models import User
+
+
+def _users(count: int):
+    return [
+        User(
+            id=index + 1,
+            email=f'user{index}@example.com',
+            display_name=f'User {index}',
+            birth_date=date(1990, 1 + index % 12, 1 + index % 28),
+            photos=[f'photos/{index}/1.jpg', f'photos/{index}/2.jpg'],
+            bio='Sun in Leo, coffee first.',
+            sun_sign='Leo',
+            chart_level=2,
+            life_path=1 + index % 9,
+            soul_urge=11,
+            expression=3,
+            personality=22,
+        )
+        for index in range(count)
+    ]
+
+
+def _match(users):
+    now = timezone.now()
+    return Match(
+        id=1,
+        user1=users[0],
+        user2=users[1],
+        user1_last_read_message_id=len(users) // 2,
+        user1_last_read_at=now,
+        user2_last_read_message_id=len(users) // 3,
+        user2_last_read_at=now,
+    )
+
+
+def _messages(users, match):
+    now = timezone.now()
+    return [
+        Message(
+            id=index + 1,
+            match=match,
+            sender=users[index % 2],
+            content=f'Message number {index}',
+            created_at=now - timedelta(minutes=index),
+        )
+        for index in range(len(users))
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark hot read serializers with and without FAST_SERIALIZERS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=1000, help='Objects per round')
+        parser.add_argument('--rounds', type=int, default=3, help='Rounds per case (best is reported)')
+
+    def handle(self, *args, **options):
+        users = _users(options['items'])
+        match = _match(users)
+        messages = _messages(users, match)
+        context = {'request': SimpleNamespace(user=users[0]), 'match': match}
+
+        cases = [
+            ('ProfileCardSerializer', ProfileCardSerializer, users),
+            ('MessageSerializer', MessageSerializer, messages),
+            ('MessageSenderSerializer', MessageSenderSerializer, users),
+        ]
+
+        for name, serializer_class, items in cases:
+            timings = {}
+            rendered = {}
+            for fast in (False, True):
+                with override_settings(FAST_SERIALIZERS=fast):
+                    best = None
+                    for _ in range(options['rounds']):
+                        start = time.perf_counter()
+                        data = serializer_class(items, many=True, context=context).data
+                        elapsed = time.perf_counter() - start
+                        best = elapsed if best is None else min(best, elapsed)
+                    timings[fast] = best / len(items) * 1e6
+                    rendered[fast] = JSONRenderer().render(data)
+
+            if rendered[False] != rendered[True]:
+                raise CommandError(f'{name}: compiled output differs from DRF output')
+
+            self.stdout.write(
+                f'{name:<26} drf {timings[False]:7.2f} us/item   '
+                f'compiled {timings[True]:7.2f} us/item   '
+                f'x{timings[False] / timings[True]:.1f}'
+            )
+
+        self.stdout.write(self.style.SUCCESS('Output identical'))
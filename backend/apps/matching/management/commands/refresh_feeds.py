@@ -0,0 +1,45 @@
+"""
+Rebuild per-user scan feeds.
+
+    python manage.py refresh_feeds              # every existing feed
+    python manage.py refresh_feeds --all        # every active, profile-complete user
+    python manage.py refresh_feeds --low        # only feeds below SCAN_FEED_LOW_WATER
+    python manage.py refresh_feeds --user 42
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from apps.matching.feed import rebuild_feed
+from apps.matching.models import FeedEntry
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-user scan feeds'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Build a feed for every eligible user')
+        parser.add_argument('--low', action='store_true', help='Only rebuild feeds that are running low')
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', help='User id (repeatable)')
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_active=True, is_profile_complete=True)
+
+        if options['user_ids']:
+            users = users.filter(id__in=options['user_ids'])
+        elif options['low']:
+            low = FeedEntry.objects.values('user_id').annotate(
+                size=Count('id')
+            ).filter(size__lt=settings.SCAN_FEED_LOW_WATER).values('user_id')
+            users = users.filter(id__in=low)
+        elif not options['all']:
+            users = users.filter(id__in=FeedEntry.objects.values('user_id'))
+
+        rebuilt = 0
+        for user in users.iterator(chunk_size=100):
+            rebuild_feed(user)
+            rebuilt += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rebuilt} feeds'))
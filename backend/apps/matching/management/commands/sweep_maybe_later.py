@@ -0,0 +1,23 @@
+"""
+Resolve expired maybe_later resonances. Run periodically (e.g. hourly from cron).
+
+    python manage.py sweep_maybe_later                    # MAYBE_LATER_EXPIRED_POLICY
+    python manage.py sweep_maybe_later --policy decline
+    python manage.py sweep_maybe_later --batch-size 500
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.matching.services import sweep_expired_maybe_later
+
+
+class Command(BaseCommand):
+    help = 'Release or decline expired maybe_later resonances'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--policy', choices=['release', 'decline'], help='Override MAYBE_LATER_EXPIRED_POLICY')
+        parser.add_argument('--batch-size', type=int, help='Rows per batch')
+
+    def handle(self, *args, **options):
+        swept = sweep_expired_maybe_later(options['policy'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Swept {swept} expired maybe_later resonances'))
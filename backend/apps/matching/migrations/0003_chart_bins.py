@@ -0,0 +1,60 @@
+# Generated by Django 6.1.2 on 2026-10-19 03:07
+
+import math
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen copy of apps.matching.aspect_index.chart_bins as of this migration
+KEY_PLANETS = ['sun', 'moon', 'venus', 'mars', 'mercury']
+
+
+def chart_bins(chart_data):
+    planets = (chart_data or {}).get('planets') or {}
+
+    bins = {}
+    for planet in KEY_PLANETS:
+        position = planets.get(planet)
+        if position and position.get('longitude') is not None:
+            bins[planet] = int(math.floor(position['longitude'])) % 360
+    return bins
+
+
+def index_existing_charts(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    ChartBin = apps.get_model('matching', 'ChartBin')
+
+    rows = []
+    for user_id, chart_data in User.objects.exclude(chart_data=None).values_list('id', 'chart_data').iterator():
+        rows.extend(
+            ChartBin(user_id=user_id, planet=planet, degree=degree)
+            for planet, degree in chart_bins(chart_data).items()
+        )
+    ChartBin.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChartBin',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('planet', models.CharField(max_length=10)),
+                ('degree', models.SmallIntegerField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chart_bins', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'chart_bins',
+                'indexes': [models.Index(fields=['planet', 'degree'], name='chart_bins_planet_465299_idx')],
+                'unique_together': {('user', 'planet')},
+            },
+        ),
+        migrations.RunPython(index_existing_charts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.1.2 on 2026-10-19 03:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0004_feed_entries'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='resonance',
+            name='resonances_expires_6d6143_idx',
+        ),
+        migrations.AddIndex(
+            model_name='resonance',
+            index=models.Index(condition=models.Q(('action', 'maybe_later')), fields=['from_user', 'expires_at'], name='resonances_maybe_later_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resonance',
+            index=models.Index(condition=models.Q(('action', 'maybe_later')), fields=['expires_at'], name='resonances_expiry_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 6.1.2 on 2026-10-19 03:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+
+def fill_incoming_likes(apps, schema_editor):
+    Resonance = apps.get_model('matching', 'Resonance')
+    IncomingLike = apps.get_model('matching', 'IncomingLike')
+
+    pending = Resonance.objects.filter(action='resonate').exclude(
+        Exists(Resonance.objects.filter(
+            from_user_id=OuterRef('to_user_id'),
+            to_user_id=OuterRef('from_user_id'),
+        ))
+    ).values_list('id', 'to_user_id', 'from_user_id', 'compatibility_score', 'created_at')
+
+    batch = []
+    for resonance_id, user_id, from_user_id, score, created_at in pending.iterator(chunk_size=1000):
+        batch.append(IncomingLike(
+            resonance_id=resonance_id,
+            user_id=user_id,
+            from_user_id=from_user_id,
+            compatibility_score=score,
+            created_at=created_at,
+        ))
+        if len(batch) >= 1000:
+            IncomingLike.objects.bulk_create(batch)
+            batch = []
+    IncomingLike.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0005_maybe_later_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IncomingLike',
+            fields=[
+                ('resonance', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='matching.resonance')),
+                ('compatibility_score', models.IntegerField(null=True)),
+                ('created_at', models.DateTimeField()),
+                ('from_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='incoming_likes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'incoming_likes',
+                'indexes': [models.Index(fields=['user', '-created_at'], name='incoming_li_user_id_a1f20b_idx')],
+                'unique_together': {('user', 'from_user')},
+            },
+        ),
+        migrations.RunPython(fill_incoming_likes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 6.1.2 on 2026-10-19 03:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Substr
+
+
+def fill_conversation_state(apps, schema_editor):
+    Match = apps.get_model('matching', 'Match')
+    Message = apps.get_model('messaging', 'Message')
+
+    latest = Message.objects.filter(match=OuterRef('pk')).order_by('-created_at', '-id')
+
+    def unread_by(side):
+        return Coalesce(Subquery(
+            Message.objects.filter(
+                match=OuterRef('pk'),
+                read_at__isnull=True,
+            ).exclude(
+                sender=OuterRef(side)
+            ).values('match').annotate(count=Count('id')).values('count')
+        ), 0)
+
+    Match.objects.filter(
+        id__in=Message.objects.values('match_id')
+    ).update(
+        last_message=Subquery(latest.values('id')[:1]),
+        last_message_preview=Subquery(
+            latest.annotate(preview=Substr('content', 1, 100)).values('preview')[:1]
+        ),
+        user1_unread_count=unread_by('user1'),
+        user2_unread_count=unread_by('user2'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0006_incoming_likes'),
+        ('messaging', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='last_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='messaging.message'),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='last_message_preview',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='user1_unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='user2_unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_conversation_state, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 6.1.2 on 2026-10-19 03:40
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_read_watermarks(apps, schema_editor):
+    """Watermarks from the newest message each side had read, then unread counts from them."""
+    Match = apps.get_model('matching', 'Match')
+    Message = apps.get_model('messaging', 'Message')
+
+    def read_by(side, aggregate):
+        return Subquery(
+            Message.objects.filter(
+                match=OuterRef('pk'),
+                read_at__isnull=False,
+            ).exclude(
+                sender=OuterRef(side)
+            ).order_by().values('match').annotate(value=aggregate).values('value')
+        )
+
+    def unread_by(side):
+        return Coalesce(Subquery(
+            Message.objects.filter(
+                match=OuterRef('pk'),
+                id__gt=OuterRef(f'{side}_last_read_message_id'),
+            ).exclude(
+                sender=OuterRef(side)
+            ).order_by().values('match').annotate(count=Count('id')).values('count')
+        ), 0)
+
+    matches = Match.objects.filter(id__in=Message.objects.values('match_id'))
+    matches.update(
+        user1_last_read_message_id=Coalesce(read_by('user1', Max('id')), 0),
+        user1_last_read_at=read_by('user1', Max('read_at')),
+        user2_last_read_message_id=Coalesce(read_by('user2', Max('id')), 0),
+        user2_last_read_at=read_by('user2', Max('read_at')),
+    )
+    matches.update(
+        user1_unread_count=unread_by('user1'),
+        user2_unread_count=unread_by('user2'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0007_conversation_state'),
+        ('messaging', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='user1_last_read_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='user1_last_read_message_id',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='user2_last_read_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='user2_last_read_message_id',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_read_watermarks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.1.2 on 2026-10-19 04:29
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def fill_activity_at(apps, schema_editor):
+    Match = apps.get_model('matching', 'Match')
+    Match.objects.update(activity_at=Coalesce('last_message_at', 'created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0008_read_watermarks'),
+        ('messaging', '0004_message_client_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(fill_activity_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['user1', '-activity_at', '-id'], name='matches_user1_i_98e8cc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['user2', '-activity_at', '-id'], name='matches_user2_i_68fcc8_idx'),
+        ),
+    ]
@@ -1,9 +1,10 @@
 """
-Matching models: Resonance and Match.
+Matching models: Resonance, Match, the likes inbox and scan retrieval tables.
 """
 
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class Resonance(models.Model):
@@ -40,7 +41,17 @@ class Resonance(models.Model):
         indexes = [
             models.Index(fields=['from_user', 'action']),
             models.Index(fields=['to_user', 'action']),
-            models.Index(fields=['expires_at']),
+            # Only maybe_later rows expire: the user's queue and the sweeper
+            models.Index(
+                fields=['from_user', 'expires_at'],
+                condition=models.Q(action='maybe_later'),
+                name='resonances_maybe_later_idx',
+            ),
+            models.Index(
+                fields=['expires_at'],
+                condition=models.Q(action='maybe_later'),
+                name='resonances_expiry_idx',
+            ),
         ]
 
     def __str__(self):
@@ -64,9 +75,27 @@ class Match(models.Model):
     compatibility_data = models.JSONField()  # Full breakdown
     overall_score = models.IntegerField()
 
-    # Messaging state
+    # Messaging state, kept up to date by apps.messaging.services
     is_conversation_started = models.BooleanField(default=False)
     last_message_at = models.DateTimeField(null=True, blank=True)
+    last_message = models.ForeignKey(
+        'messaging.Message',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    last_message_preview = models.CharField(max_length=100, blank=True, default='')
+    user1_unread_count = models.PositiveIntegerField(default=0)  # messages user1 hasn't read
+    user2_unread_count = models.PositiveIntegerField(default=0)
+    # Conversation list order: the last message's time, or when the match was made
+    activity_at = models.DateTimeField(default=timezone.now)
+
+    # Read watermarks: each user has read every message up to this id (0 = none)
+    user1_last_read_message_id = models.PositiveBigIntegerField(default=0)
+    user1_last_read_at = models.DateTimeField(null=True, blank=True)
+    user2_last_read_message_id = models.PositiveBigIntegerField(default=0)
+    user2_last_read_at = models.DateTimeField(null=True, blank=True)
 
     # Match timing (for time-gating feature)
     reveal_slot = models.IntegerField(null=True)  # 0-5 for 6 slots per day
@@ -79,6 +108,8 @@ class Match(models.Model):
         indexes = [
             models.Index(fields=['user1', 'created_at']),
             models.Index(fields=['user2', 'created_at']),
+            models.Index(fields=['user1', '-activity_at', '-id']),
+            models.Index(fields=['user2', '-activity_at', '-id']),
         ]
 
     def __str__(self):
@@ -87,3 +118,129 @@ class Match(models.Model):
     def get_other_user(self, user):
         """Return the other user in the match."""
         return self.user2 if self.user1_id == user.id else self.user1
+
+    def get_unread_count(self, user):
+        """Return how many messages the user hasn't read yet."""
+        return self.user1_unread_count if self.user1_id == user.id else self.user2_unread_count
+
+    def unread_field(self, user) -> str:
+        """Name of the user's unread counter column."""
+        return 'user1_unread_count' if self.user1_id == user.id else 'user2_unread_count'
+
+    def side(self, user) -> str:
+        """Column prefix of the user's side of the match, 'user1' or 'user2'."""
+        return 'user1' if self.user1_id == user.id else 'user2'
+
+    def message_read_at(self, message):
+        """
+        When the recipient read a message, from their read watermark.
+
+        Returns:
+            The time the recipient last read the conversation, if that read
+            covered the message; None while the message is unread
+        """
+        recipient = 'user2' if message.sender_id == self.user1_id else 'user1'
+        if message.id is not None and message.id <= getattr(self, f'{recipient}_last_read_message_id'):
+            return getattr(self, f'{recipient}_last_read_at')
+        return None
+
+
+class ChartBin(models.Model):
+    """
+    Inverted index of planet positions by whole-degree longitude bin.
+
+    One row per (user, synastry planet), maintained on profile write.
+    Lets scans find users whose planets sit in harmonious arcs without
+    scoring everybody.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='chart_bins'
+    )
+    planet = models.CharField(max_length=10)
+    degree = models.SmallIntegerField()  # floor(longitude), 0-359
+
+    class Meta:
+        db_table = 'chart_bins'
+        unique_together = ('user', 'planet')
+        indexes = [
+            models.Index(fields=['planet', 'degree']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.planet} @ {self.degree}"
+
+
+class FeedEntry(models.Model):
+    """
+    Precomputed scan candidate in a user's feed.
+
+    Each user's feed holds their best scored candidates, kept fresh in the
+    background (see apps.matching.feed). Scans pop from the top.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    candidate = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    score = models.SmallIntegerField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'feed_entries'
+        unique_together = ('user', 'candidate')
+        indexes = [
+            models.Index(fields=['user', '-score']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} feed: {self.candidate_id} ({self.score})"
+
+
+class IncomingLike(models.Model):
+    """
+    Pending incoming resonance in a user's "likes you" inbox.
+
+    One row per resonate that its target has not responded to yet, kept in
+    step with resonance writes (see apps.matching.inbox). Shares its id with
+    the resonance it mirrors.
+    """
+
+    resonance = models.OneToOneField(
+        Resonance,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+'
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='incoming_likes'
+    )
+    from_user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    compatibility_score = models.IntegerField(null=True)
+
+    created_at = models.DateTimeField()  # when the resonance was sent
+
+    class Meta:
+        db_table = 'incoming_likes'
+        unique_together = ('user', 'from_user')
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.from_user_id} likes {self.user_id}"
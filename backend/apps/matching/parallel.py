@@ -0,0 +1,69 @@
+"""
+Parallel scoring for large scan pools.
+
+Two persistent pools, created on first use and reused across requests:
+- a thread pool for the feature store's NumPy kernels, which release the GIL
+- a process pool for pure-Python compatibility calculations
+
+Each chunk of the pool returns its own partial top-k, and the partial results
+are merged with a heap. Pools smaller than the configured thresholds skip all
+of this and are scored inline.
+"""
+
+import heapq
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain
+from typing import Callable, Iterable, List, Optional, Sequence, TypeVar
+
+from django.conf import settings
+
+T = TypeVar('T')
+
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def worker_count() -> int:
+    """Configured scoring workers; 0 or 1 means score inline."""
+    return settings.SCAN_PARALLEL_WORKERS
+
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    global _thread_pool
+    with _pool_lock:
+        if _thread_pool is None:
+            _thread_pool = ThreadPoolExecutor(
+                max_workers=worker_count(),
+                thread_name_prefix='scan-score',
+            )
+    return _thread_pool
+
+
+def _init_process_worker():
+    # Workers may be spawned rather than forked; make sure Django is set up
+    import django
+    django.setup()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    with _pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(
+                max_workers=worker_count(),
+                initializer=_init_process_worker,
+            )
+    return _process_pool
+
+
+def split(items: Sequence[T], parts: int) -> List[Sequence[T]]:
+    """Split a sequence into at most `parts` contiguous, non-empty chunks."""
+    size = -(-len(items) // parts)  # ceil
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def merge_top_k(partials: Iterable[List[T]], k: int, key: Callable[[T], object]) -> List[T]:
+    """Merge partial top-k lists into the overall top-k, best first."""
+    return heapq.nlargest(k, chain.from_iterable(partials), key=key)
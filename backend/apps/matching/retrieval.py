@@ -0,0 +1,183 @@
+"""
+Candidate retrieval for scans.
+
+Numerology numbers have tiny cardinality, so the eligible pool is partitioned
+into buckets by numerology fields. Buckets are visited in descending order of
+their best possible score (threshold algorithm), and retrieval stops as soon as
+the k-th best score found can no longer be beaten by any remaining bucket.
+"""
+
+import heapq
+import operator
+from functools import reduce
+from itertools import count
+from typing import Any, Callable, Container, Dict, List, Optional, Sequence, Tuple
+
+from django.db.models import Case, Count, Q, Value, When
+
+from apps.numerology.compatibility import NUMBER_WEIGHTS, get_max_harmony, get_pair_harmony
+
+from .budget import Deadline
+from .scoring import (
+    MAX_ASTROLOGY_SCORE,
+    NEUTRAL_ASTROLOGY_SCORE,
+    combine_scores,
+    has_planets,
+)
+
+# Default bucketing: 12 x 12 (life_path, soul_urge) buckets
+BUCKET_FIELDS = ('life_path', 'soul_urge')
+
+# Full numerology class - exact numerology score per bucket, more buckets
+CLASS_FIELDS = ('life_path', 'soul_urge', 'expression', 'personality')
+
+# Rows fetched per round trip while scanning a batch of buckets
+BUCKET_CHUNK_SIZE = 100
+
+# Rows per query: consecutive buckets are fetched together up to this size
+BUCKET_BATCH_ROWS = 500
+
+
+def bucket_upper_bound(user, bucket: Dict[str, int]) -> int:
+    """
+    Best overall score any candidate in a numerology bucket can reach.
+
+    Args:
+        user: The requesting user
+        bucket: Numerology field values shared by the bucket, e.g. {'life_path': 3}
+
+    Returns:
+        Upper bound on the combined 0-100 score
+    """
+    numerology = 0
+    for field, weight in NUMBER_WEIGHTS.items():
+        if field in bucket:
+            harmony = get_pair_harmony(getattr(user, field), bucket[field])
+        else:
+            harmony = get_max_harmony(getattr(user, field))
+        numerology += harmony * weight
+
+    astrology = MAX_ASTROLOGY_SCORE if has_planets(user.chart_data) else NEUTRAL_ASTROLOGY_SCORE
+
+    return combine_scores(int(numerology), astrology)
+
+
+def top_k_by_buckets(
+    user,
+    queryset,
+    k: int,
+    score_fn: Callable[[Any], Tuple[int, Any]],
+    fields: Sequence[str] = BUCKET_FIELDS,
+    exclude: Container[int] = (),
+    accept: Optional[Callable[[Any], bool]] = None,
+    deadline: Optional[Deadline] = None,
+    only: Optional[Sequence[str]] = None,
+) -> List[Tuple[int, Any, Any]]:
+    """
+    Retrieve the k best scoring candidates without scoring the whole pool.
+
+    Buckets are fetched a batch at a time: consecutive buckets in bound order
+    are combined into one query of about BUCKET_BATCH_ROWS rows, ordered by
+    bucket, so the early stop still applies row by row.
+
+    Args:
+        user: The requesting user
+        queryset: Eligible candidates (already filtered)
+        k: Number of results wanted
+        score_fn: candidate -> (score, payload)
+        fields: Numerology fields to bucket by (BUCKET_FIELDS or CLASS_FIELDS)
+        exclude: Candidate ids to skip (e.g. the user's seen-set)
+        accept: Optional candidate -> bool check for filters SQL can only
+            approximate (e.g. exact distance)
+        deadline: Optional Deadline; once it passes, the best results found
+            so far (at least one, if any) are returned and deadline.hit is set
+        only: Columns score_fn and accept read. Rows are scored with just
+            these loaded; the winners are then loaded in full in one query.
+
+    Returns:
+        List of (score, payload, candidate), best first
+    """
+    if k <= 0:
+        return []
+
+    buckets = queryset.order_by().values_list(*fields).annotate(size=Count('id'))
+
+    ranked = sorted(
+        (
+            (bucket_upper_bound(user, dict(zip(fields, values))), tuple(values), size)
+            for *values, size in buckets
+        ),
+        key=lambda item: item[0],
+        reverse=True,
+    )
+    rows_queryset = queryset.only('id', *fields, *only) if only else queryset
+
+    # Min-heap of the best k so far; the sequence keeps earlier rows on ties
+    heap: List[Tuple[int, int, Any, Any]] = []
+    sequence = count()
+
+    position = 0
+    while position < len(ranked):
+        if len(heap) >= k and heap[0][0] >= ranked[position][0]:
+            break
+        # Out of time: settle for the best found so far (never nothing)
+        if deadline is not None and heap and deadline.expired():
+            break
+
+        # Next buckets in bound order, up to about BUCKET_BATCH_ROWS rows
+        batch = []
+        rows_in_batch = 0
+        while position < len(ranked) and (not batch or rows_in_batch + ranked[position][2] <= BUCKET_BATCH_ROWS):
+            bound, values, size = ranked[position]
+            if len(heap) >= k and heap[0][0] >= bound:
+                break
+            batch.append((bound, values))
+            rows_in_batch += size
+            position += 1
+        if not batch:
+            break
+
+        conditions = [Q(**dict(zip(fields, values))) for _, values in batch]
+        bounds = {values: bound for bound, values in batch}
+        rows = rows_queryset.filter(reduce(operator.or_, conditions)).order_by(
+            Case(*(When(condition, then=Value(index)) for index, condition in enumerate(conditions))),
+            'id',
+        )
+
+        stopped = False
+        for candidate in rows.iterator(chunk_size=BUCKET_CHUNK_SIZE):
+            bound = bounds[tuple(getattr(candidate, field) for field in fields)]
+            # Nothing left in this bucket or the later ones can beat the k-th best
+            if len(heap) >= k and heap[0][0] >= bound:
+                stopped = True
+                break
+            if deadline is not None and heap and deadline.expired():
+                stopped = True
+                break
+            if candidate.id in exclude:
+                continue
+            if accept is not None and not accept(candidate):
+                continue
+
+            score, payload = score_fn(candidate)
+            entry = (score, -next(sequence), payload, candidate)
+
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+        if stopped:
+            break
+
+    heap.sort(reverse=True)
+    winners = [(score, payload, candidate) for score, _, payload, candidate in heap]
+
+    if only:
+        # Load the winners in full; one may have left the pool meanwhile
+        full = queryset.in_bulk([candidate.id for _, _, candidate in winners])
+        winners = [
+            (score, payload, full[candidate.id])
+            for score, payload, candidate in winners
+            if candidate.id in full
+        ]
+    return winners
@@ -0,0 +1,227 @@
+"""
+Scan sessions.
+
+A scan ranks up to SCAN_SESSION_SIZE candidates once and keeps the ranked
+(id, score) list in the cache for SCAN_SESSION_TTL. The response carries a
+signed cursor into that list, so later pages only re-check eligibility and
+serialize - no rescoring - and stay stable while resonances are recorded.
+
+Scans served from the user's feed are already ranked, so they pop one page
+at a time and leave the rest in the feed: the session lists what it has
+popped, and a cursor past the end pops the next page (under a cache lock,
+so concurrent requests on one cursor don't both pop). Those later pages
+follow the feed as it is then, skipping candidates already listed.
+
+Each scanned profile also gets a signed scan token carrying its score, which
+the client sends back with its resonance so the score is not recalculated.
+A token is only honoured while both profiles are unchanged.
+"""
+
+import secrets
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+
+from .budget import Deadline, record_scan
+from .cache_lock import cache_lock
+from .compat_cache import get_cached_compatibility
+from .feed import feed_enabled, pop_feed, schedule_rebuild
+
+CURSOR_SALT = 'apps.matching.scan_session'
+TOKEN_SALT = 'apps.matching.scan_token'
+
+
+def _key(session_id: str) -> str:
+    return f'scan-session:{session_id}'
+
+
+def _cursor(user, session_id: str, offset: int) -> str:
+    return signing.dumps({'u': user.id, 's': session_id, 'o': offset}, salt=CURSOR_SALT)
+
+
+def scan_token(user, candidate, score: int) -> str:
+    """Signed token vouching for the pair's score at the profiles' current versions."""
+    return signing.dumps(
+        {
+            'f': user.id,
+            't': candidate.id,
+            's': score,
+            'v': [user.profile_version, candidate.profile_version],
+        },
+        salt=TOKEN_SALT,
+        compress=False,
+    )
+
+
+def read_scan_token(token: str, from_user, to_user) -> Optional[int]:
+    """
+    Score carried by a scan token.
+
+    Returns:
+        The score, or None when the token is invalid, older than
+        SCAN_TOKEN_MAX_AGE, for another pair, or either profile has changed
+    """
+    try:
+        data = signing.loads(token, salt=TOKEN_SALT, max_age=settings.SCAN_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+
+    if (data['f'], data['t']) != (from_user.id, to_user.id):
+        return None
+    if data['v'] != [from_user.profile_version, to_user.profile_version]:
+        return None
+    return data['s']
+
+
+def _page(user, candidates: List, session_id: str, offset: int, more: bool) -> Tuple[List[Dict], Optional[str]]:
+    """Attach compatibility to a page of candidates and build the next cursor."""
+    results = []
+    for candidate in candidates:
+        compatibility = get_cached_compatibility(user, candidate)
+        results.append({
+            'user': candidate,
+            'compatibility': compatibility,
+            'scan_token': scan_token(user, candidate, compatibility['overall_score']),
+        })
+    next_cursor = _cursor(user, session_id, offset) if more else None
+    return results, next_cursor
+
+
+def _pop_page(user, session: Dict, count: int) -> List:
+    """
+    Pop the next `count` candidates off the feed into a feed session's list.
+
+    Returns:
+        The new candidates, best first
+    """
+    listed = [user_id for user_id, _ in session['ranked']]
+    count = min(count, settings.SCAN_SESSION_SIZE - len(listed))
+    ranked, remaining = pop_feed(user, count, exclude=listed)
+
+    session['ranked'].extend((candidate.id, score) for score, candidate in ranked)
+    session['more'] = remaining > 0 and len(session['ranked']) < settings.SCAN_SESSION_SIZE
+    return [candidate for _, candidate in ranked]
+
+
+def start_scan_session(
+    user,
+    limit: int,
+    filters: Optional[Dict] = None,
+    retrieval: str = 'score',
+) -> Tuple[List[Dict], Optional[str], bool]:
+    """
+    Rank a user's scan candidates and return the first page.
+
+    Unfiltered scans take their candidates from the user's feed when feeds
+    are enabled, ranking inline only if it is empty. Ranking is bounded by
+    SCAN_LATENCY_BUDGET_MS; when it runs out, the best candidates found so
+    far are used and an unfiltered scan has the user's feed rebuilt in the
+    background.
+
+    retrieval='aspects' takes candidates from the angular-bin aspect index
+    instead (get_aspect_candidates). It returns a single page.
+
+    Returns:
+        ([{'user', 'compatibility', 'scan_token'}], cursor for the next page or None,
+        whether ranking stopped at the deadline)
+    """
+    from .services import get_aspect_candidates, rank_scan_candidates
+
+    if retrieval == 'aspects':
+        hits = get_aspect_candidates(user, limit, filters)
+        results, _ = _page(user, [hit['user'] for hit in hits], '', 0, False)
+        return results, None, False
+
+    session = {'ranked': [], 'filters': filters, 'feed': False, 'more': False}
+    candidates = []
+    if feed_enabled() and not filters:
+        session['feed'] = True
+        candidates = _pop_page(user, session, limit)
+
+    deadline = None
+    if not candidates:
+        # pop_feed already scheduled a rebuild of an empty feed
+        deadline = Deadline.for_scan()
+        ranked = rank_scan_candidates(user, settings.SCAN_SESSION_SIZE, filters, deadline)
+        session.update(
+            ranked=[(candidate.id, score) for score, candidate in ranked],
+            feed=False,
+            more=False,
+        )
+        candidates = [candidate for _, candidate in ranked]
+
+    partial = deadline is not None and deadline.hit
+    record_scan(user, deadline)
+    if partial and feed_enabled() and not filters:
+        schedule_rebuild(user.id)
+
+    session_id = secrets.token_urlsafe(12)
+    offset = min(limit, len(candidates))
+    more = offset < len(candidates) or session['more']
+    if more:
+        cache.set(_key(session_id), session, settings.SCAN_SESSION_TTL)
+
+    results, next_cursor = _page(user, candidates[:offset], session_id, offset, more)
+    return results, next_cursor, partial
+
+
+def get_scan_page(user, cursor: str, limit: int) -> Optional[Tuple[List[Dict], Optional[str]]]:
+    """
+    Next page of a scan session.
+
+    Candidates that stopped being eligible since they were listed
+    (resonated with, deactivated, ...) are skipped, so a page can come back
+    short.
+
+    Returns:
+        ([{'user', 'compatibility', 'scan_token'}], cursor for the next page or None),
+        or None when the cursor is invalid or the session expired
+    """
+    from .services import _candidate_queryset, _resonated_among
+
+    try:
+        position = signing.loads(cursor, salt=CURSOR_SALT, max_age=settings.SCAN_SESSION_TTL)
+    except signing.BadSignature:
+        return None
+    if position['u'] != user.id:
+        return None
+
+    session = cache.get(_key(position['s']))
+    if session is None:
+        return None
+
+    offset = position['o']
+    candidates = {}
+    if offset + limit > len(session['ranked']) and session['more']:
+        # Without the lock in time, serve what is listed; the cursor stays valid
+        with cache_lock(f'{_key(position["s"])}:lock') as locked:
+            if locked:
+                # Another request on this cursor may have popped the page meanwhile
+                session = cache.get(_key(position['s']))
+                if session is None:
+                    return None
+                missing = offset + limit - len(session['ranked'])
+                if missing > 0 and session['more']:
+                    candidates = {candidate.id: candidate for candidate in _pop_page(user, session, missing)}
+                    cache.set(_key(position['s']), session, settings.SCAN_SESSION_TTL)
+
+    ids = [user_id for user_id, _ in session['ranked'][offset:offset + limit]]
+
+    # Candidates listed on an earlier request may have gone stale since
+    listed = [user_id for user_id in ids if user_id not in candidates]
+    if listed:
+        eligible = _candidate_queryset(user, session['filters']).in_bulk(listed)
+        for user_id in _resonated_among(user, listed):
+            eligible.pop(user_id, None)
+        candidates.update(eligible)
+
+    offset += len(ids)
+    return _page(
+        user,
+        [candidates[user_id] for user_id in ids if user_id in candidates],
+        position['s'],
+        offset,
+        offset < len(session['ranked']) or session['more'],
+    )
@@ -0,0 +1,52 @@
+"""
+Score combination shared by compatibility calculations and candidate retrieval.
+"""
+
+from typing import NamedTuple, Optional
+
+# Combined overall score weights (60% numerology, 40% astrology)
+NUMEROLOGY_WEIGHT = 0.6
+ASTROLOGY_WEIGHT = 0.4
+
+# Astrology score used when either user has no planet data
+NEUTRAL_ASTROLOGY_SCORE = 50
+MAX_ASTROLOGY_SCORE = 100
+
+
+def combine_scores(numerology_score: float, astrology_score: float) -> int:
+    """Combine numerology and astrology scores into the 0-100 overall score."""
+    return int(numerology_score * NUMEROLOGY_WEIGHT + astrology_score * ASTROLOGY_WEIGHT)
+
+
+def has_planets(chart_data) -> bool:
+    """Whether a chart (User.chart_data) has planet positions usable for synastry."""
+    return bool(chart_data and chart_data.get('planets'))
+
+
+class CompatProfile(NamedTuple):
+    """
+    The user fields compatibility calculations read.
+
+    Cheap to pickle, so it can be sent to scoring worker processes in place
+    of a full User instance.
+    """
+    id: int
+    life_path: int
+    soul_urge: int
+    expression: int
+    personality: int
+    sun_sign: Optional[str]
+    chart_data: Optional[dict]
+
+
+def compat_profile(user) -> CompatProfile:
+    """Snapshot the compatibility fields of a user."""
+    return CompatProfile(
+        id=user.id,
+        life_path=user.life_path,
+        soul_urge=user.soul_urge,
+        expression=user.expression,
+        personality=user.personality,
+        sun_sign=user.sun_sign,
+        chart_data=user.chart_data,
+    )
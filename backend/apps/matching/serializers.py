@@ -2,15 +2,20 @@
 Matching serializers for API responses.
 """
 
+from django.utils.functional import cached_property
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 
-from .models import Resonance, Match
+from core.compiled import CompiledSerializerMixin
+from core.fieldsets import SparseFieldsetMixin
+
+from .compact import expand_compatibility
+from .models import IncomingLike, Resonance, Match
 
 User = get_user_model()
 
 
-class ProfileCardSerializer(serializers.ModelSerializer):
+class ProfileCardSerializer(CompiledSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for profile cards shown in scan results.
     Includes basic info and numerology, excludes sensitive data.
@@ -52,6 +57,7 @@ class ScanResultSerializer(serializers.Serializer):
     """Serializer for a single scan result."""
     profile = ProfileCardSerializer(source='user')
     compatibility = CompatibilitySerializer()
+    scan_token = serializers.CharField()  # send back with the resonance
 
 
 class ScanResponseSerializer(serializers.Serializer):
@@ -66,12 +72,21 @@ class ScanRequestSerializer(serializers.Serializer):
     limit = serializers.IntegerField(default=10, min_value=1, max_value=50)
     age_min = serializers.IntegerField(required=False, min_value=18)
     age_max = serializers.IntegerField(required=False, max_value=99)
+    cursor = serializers.CharField(required=False)  # next page of an earlier scan
+    # 'score': best overall compatibility; 'aspects': most harmonious planet aspects
+    retrieval = serializers.ChoiceField(choices=['score', 'aspects'], default='score')
 
 
 class ResonanceRequestSerializer(serializers.Serializer):
     """Serializer for resonance action request."""
     target_user_id = serializers.IntegerField()
     action = serializers.ChoiceField(choices=['resonate', 'decline', 'maybe_later'])
+    scan_token = serializers.CharField(required=False)  # from the scan result
+
+
+class ResonanceBatchRequestSerializer(serializers.Serializer):
+    """Serializer for a batch of resonance actions."""
+    resonances = ResonanceRequestSerializer(many=True, allow_empty=False, max_length=100)
 
 
 class ResonanceResponseSerializer(serializers.Serializer):
@@ -100,8 +115,12 @@ class ResonanceSerializer(serializers.ModelSerializer):
         ]
 
 
-class MatchUserSerializer(serializers.ModelSerializer):
-    """Serializer for user in match context."""
+class MatchUserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Serializer for user in match context.
+
+    The full chart is included unless left out with ?omit=chart.
+    """
     age = serializers.IntegerField(read_only=True)
     numerology = serializers.SerializerMethodField()
     astrology = serializers.SerializerMethodField()
@@ -115,16 +134,38 @@ class MatchUserSerializer(serializers.ModelSerializer):
             'chart_level',
             'numerology', 'astrology',
         ]
+        field_sources = {
+            'age': ['birth_date'],
+            'numerology': ['life_path', 'soul_urge', 'expression', 'personality'],
+            'astrology': ['sun_sign', 'moon_sign', 'rising_sign', 'chart_level'],
+        }
+
+    def model_fields(self):
+        columns = super().model_fields()
+        if columns is not None and 'astrology' in self.fields and not self.omitted('chart'):
+            columns.append('chart_data')
+        return columns
 
     def get_numerology(self, obj):
         return obj.get_numerology()
 
     def get_astrology(self, obj):
-        return obj.get_astrology()
+        if not self.omitted('chart'):
+            return obj.get_astrology()
+        return {
+            'sun_sign': obj.sun_sign,
+            'moon_sign': obj.moon_sign,
+            'rising_sign': obj.rising_sign,
+            'chart_level': obj.chart_level,
+        }
 
 
-class MatchSerializer(serializers.ModelSerializer):
-    """Serializer for Match model."""
+class MatchSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Serializer for Match model.
+
+    Expects user1 and user2 to be loaded with the match (select_related).
+    """
     other_user = serializers.SerializerMethodField()
     compatibility = serializers.SerializerMethodField()
 
@@ -136,17 +177,39 @@ class MatchSerializer(serializers.ModelSerializer):
             'is_conversation_started', 'last_message_at',
             'created_at',
         ]
+        field_sources = {
+            'other_user': ['user1', 'user2'],
+            'compatibility': ['compatibility_data'],
+        }
+
+    @cached_property
+    def _user_serializer(self):
+        # One instance for every row of a list
+        return MatchUserSerializer(
+            context=self.context,
+            sparse_fields=(self.sparse_fields or {}).get('other_user', {}),
+        )
+
+    def model_fields(self):
+        columns = super().model_fields()
+        if columns is not None and 'other_user' in self.fields:
+            nested = self._user_serializer.model_fields()
+            if nested is None:
+                return None
+            columns.extend(f'{side}__{column}' for side in ('user1', 'user2') for column in nested)
+        return columns
 
     def get_other_user(self, obj):
         request = self.context.get('request')
         if request:
             other = obj.get_other_user(request.user)
-            return MatchUserSerializer(other).data
-        # Fallback - return user2
-        return MatchUserSerializer(obj.user2).data
+        else:
+            # Fallback - return user2
+            other = obj.user2
+        return self._user_serializer.to_representation(other)
 
     def get_compatibility(self, obj):
-        return obj.compatibility_data
+        return expand_compatibility(obj.compatibility_data)
 
 
 class MatchDetailSerializer(MatchSerializer):
@@ -171,16 +234,14 @@ class EvaluateResponseSerializer(serializers.Serializer):
 
 class IncomingResonanceSerializer(serializers.ModelSerializer):
     """Serializer for incoming resonances (people who liked you)."""
-    user = serializers.SerializerMethodField()
+    id = serializers.IntegerField(source='resonance_id')
+    user = ProfileCardSerializer(source='from_user')
     compatibility_score = serializers.IntegerField()
 
     class Meta:
-        model = Resonance
+        model = IncomingLike
         fields = ['id', 'user', 'compatibility_score', 'created_at']
 
-    def get_user(self, obj):
-        return ProfileCardSerializer(obj.from_user).data
-
 
 class MaybeLaterSerializer(serializers.ModelSerializer):
     """Serializer for Maybe Later queue items."""
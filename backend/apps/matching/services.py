@@ -2,21 +2,47 @@
 Matching services - Combined compatibility calculations.
 """
 
-from typing import Dict, List, Optional, Tuple
-from datetime import timedelta
+import heapq
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import date, timedelta
+from django.conf import settings
 from django.utils import timezone
+from django.db import transaction
 from django.db.models import Q
 
 from apps.numerology.compatibility import (
     calculate_compatibility as calculate_numerology_compatibility,
+    calculate_compatibility_score as calculate_numerology_score,
     get_match_type,
     MATCH_TYPE_DESCRIPTIONS,
 )
 from apps.astrology.compatibility import (
     calculate_synastry,
+    calculate_synastry_score,
     get_aspect_meaning,
 )
 
+from .aspect_index import get_aspect_candidate_ids
+from .budget import Deadline
+from .compact import compact_compatibility
+from .compat_cache import get_cached_compatibility, peek_cached_compatibility
+from .feature_store import get_feature_store
+from .geo import cell_filter, filter_within, is_within, search_radius
+from .inbox import sync_inbox
+from .parallel import get_process_pool, merge_top_k, split, worker_count
+from .retrieval import top_k_by_buckets
+from .scoring import combine_scores, compat_profile, has_planets, NEUTRAL_ASTROLOGY_SCORE
+from .seen_set import forget_seen_set, get_seen_set, mark_seen
+
+# Extra feature store hits fetched to cover rows that went stale since the last refresh
+FEATURE_STORE_SLACK = 10
+
+# User columns calculate_compatibility_score and the distance check read
+SCORING_FIELDS = (
+    'life_path', 'soul_urge', 'expression', 'personality', 'chart_data',
+    'latitude', 'longitude',
+)
+
 
 def calculate_full_compatibility(user1, user2) -> Dict:
     """
@@ -54,7 +80,6 @@ def calculate_full_compatibility(user1, user2) -> Dict:
 
     # Astrology compatibility (if both have chart data)
     astrology = None
-    astrology_score = 50  # Default neutral score
 
     if user1.chart_data and user2.chart_data:
         user1_planets = user1.chart_data.get('planets', {})
@@ -62,18 +87,32 @@ def calculate_full_compatibility(user1, user2) -> Dict:
 
         if user1_planets and user2_planets:
             astrology = calculate_synastry(user1_planets, user2_planets)
-            astrology_score = astrology['overall_compatibility']
 
-            # Add aspect meanings
-            for aspect in astrology.get('aspects', []):
-                aspect['meaning'] = get_aspect_meaning(
-                    aspect['planet1'],
-                    aspect['planet2'],
-                    aspect['aspect']
-                )
+    return build_full_compatibility(numerology, astrology, user1, user2)
+
+
+def build_full_compatibility(numerology: Dict, astrology: Optional[Dict], user1, user2) -> Dict:
+    """
+    Combine numerology and synastry results into the full compatibility dict.
+
+    Second half of calculate_full_compatibility, also used to expand stored
+    compact breakdowns. Only the users' numbers and sun signs are read.
+    """
+    astrology_score = NEUTRAL_ASTROLOGY_SCORE
+
+    if astrology:
+        astrology_score = astrology['overall_compatibility']
+
+        # Add aspect meanings
+        for aspect in astrology.get('aspects', []):
+            aspect['meaning'] = get_aspect_meaning(
+                aspect['planet1'],
+                aspect['planet2'],
+                aspect['aspect']
+            )
 
     # Combined overall score (60% numerology, 40% astrology)
-    overall_score = int(numerology['overall_score'] * 0.6 + astrology_score * 0.4)
+    overall_score = combine_scores(numerology['overall_score'], astrology_score)
 
     # Determine match type
     match_type = get_match_type(overall_score)
@@ -92,6 +131,103 @@ def calculate_full_compatibility(user1, user2) -> Dict:
     }
 
 
+def calculate_compatibility_score(user1, user2) -> int:
+    """
+    Calculate only the overall compatibility score between two users.
+
+    First phase of two-phase compatibility: enough to rank candidates, without
+    aspect meanings, highlights or descriptions. Always equal to
+    calculate_full_compatibility(user1, user2)['overall_score'].
+    """
+    numerology_score = calculate_numerology_score(
+        {
+            'life_path': user1.life_path,
+            'soul_urge': user1.soul_urge,
+            'expression': user1.expression,
+            'personality': user1.personality,
+        },
+        {
+            'life_path': user2.life_path,
+            'soul_urge': user2.soul_urge,
+            'expression': user2.expression,
+            'personality': user2.personality,
+        },
+    )
+
+    astrology_score = NEUTRAL_ASTROLOGY_SCORE
+    if has_planets(user1.chart_data) and has_planets(user2.chart_data):
+        astrology_score = calculate_synastry_score(
+            user1.chart_data['planets'],
+            user2.chart_data['planets'],
+        )
+
+    return combine_scores(numerology_score, astrology_score)
+
+
+def rank_candidates(user, candidates: List, limit: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    Rank candidates by score only.
+
+    Large candidate lists are split across the scoring process pool; each
+    chunk keeps its own best `limit` results and the partial results are merged.
+
+    Args:
+        user: The requesting user
+        candidates: User instances to score
+        limit: Keep only the best `limit` results (all when None)
+
+    Returns:
+        List of (score, index into candidates), best first (ties keep input order)
+    """
+    limit = len(candidates) if limit is None else limit
+    workers = worker_count()
+
+    if workers <= 1 or len(candidates) < settings.SCAN_PARALLEL_MIN_CANDIDATES:
+        return _score_chunk(user, candidates, 0, limit)
+
+    profile = compat_profile(user)
+    chunks = split([compat_profile(candidate) for candidate in candidates], workers)
+    offsets = [sum(len(chunk) for chunk in chunks[:i]) for i in range(len(chunks))]
+    partials = get_process_pool().map(
+        _score_chunk,
+        [profile] * len(chunks), chunks, offsets, [limit] * len(chunks),
+    )
+    return merge_top_k(partials, limit, key=lambda item: (item[0], -item[1]))
+
+
+def _score_chunk(user, candidates, offset: int, limit: int) -> List[Tuple[int, int]]:
+    """Score a chunk of candidates; returns its top (score, index)."""
+    scored = [
+        (calculate_compatibility_score(user, candidate), index)
+        for index, candidate in enumerate(candidates, start=offset)
+    ]
+    return heapq.nlargest(limit, scored, key=lambda item: (item[0], -item[1]))
+
+
+def calculate_full_compatibility_many(user, candidates: List, limit: Optional[int] = None) -> List[Dict]:
+    """
+    Calculate full compatibility of one user against many candidates.
+
+    Candidates are ranked by score only, and the full breakdown is built just
+    for the best `limit`.
+
+    Args:
+        user: The requesting user
+        candidates: User instances to score
+        limit: Keep only the best `limit` results (all when None)
+
+    Returns:
+        List of {'user', 'compatibility'}, best first (ties keep input order)
+    """
+    return [
+        {
+            'user': candidates[index],
+            'compatibility': get_cached_compatibility(user, candidates[index]),
+        }
+        for _, index in rank_candidates(user, candidates, limit)
+    ]
+
+
 def _generate_highlights(
     numerology: Dict,
     astrology: Optional[Dict],
@@ -171,74 +307,262 @@ def _check_element_compatibility(sign1: str, sign2: str) -> Optional[str]:
     return None
 
 
-def get_scan_candidates(user, limit: int = 20, filters: Optional[Dict] = None) -> List:
+def _birth_date_range(user, filters: Optional[Dict] = None) -> Optional[Tuple[date, date]]:
     """
-    Get potential matches for a user.
+    Birth date bounds for the scan age filter.
+
+    Returns:
+        (min_birth_date, max_birth_date), or None when no age filter applies
+    """
+    if not filters:
+        return None
+
+    age_min = filters.get('age_min', user.age_min_preference)
+    age_max = filters.get('age_max', user.age_max_preference)
+
+    today = timezone.now().date()
+    max_birth_date = today.replace(year=today.year - age_min)
+    min_birth_date = today.replace(year=today.year - age_max - 1)
+
+    return min_birth_date, max_birth_date
+
+
+def _candidate_queryset(user, filters: Optional[Dict] = None):
+    """
+    Build the queryset of users eligible to appear in a user's scan.
+
+    Users already resonated with are not excluded here; callers subtract the
+    user's seen-set in memory and re-check the winners with _resonated_among.
+    The distance filter is coarse (grid cells); callers apply the exact check.
 
     Args:
         user: The requesting user
-        limit: Maximum number of results
-        filters: Optional filters (age_min, age_max, gender)
+        filters: Optional filters (age_min, age_max)
 
     Returns:
-        List of user instances with compatibility scores
+        QuerySet of User
     """
-    from apps.users.models import User
-    from apps.matching.models import Resonance
+    from apps.users.models import GENDER_BITS, User, masks_accepting
 
-    # Get IDs of users already resonated with
-    resonated_ids = Resonance.objects.filter(
-        from_user=user
-    ).values_list('to_user_id', flat=True)
-
-    # Base query - exclude self and already resonated
+    # Base query - exclude self
     queryset = User.objects.filter(
         is_active=True,
         is_profile_complete=True,
     ).exclude(
         id=user.id
-    ).exclude(
-        id__in=resonated_ids
     )
 
-    # Apply gender filter
-    if user.interested_in:
-        queryset = queryset.filter(gender__in=user.interested_in)
+    # Apply gender filter both ways, as integer predicates on the bitmask columns
+    if user.interested_in_mask:
+        queryset = queryset.filter(gender_bit__in=[
+            bit for bit in GENDER_BITS.values() if user.interested_in_mask & bit
+        ])
+    if user.gender_bit:
+        queryset = queryset.filter(interested_in_mask__in=masks_accepting(user.gender_bit))
 
     # Apply age filter
-    if filters:
-        age_min = filters.get('age_min', user.age_min_preference)
-        age_max = filters.get('age_max', user.age_max_preference)
-
-        # Calculate birth date range for age filter
-        today = timezone.now().date()
-        max_birth_date = today.replace(year=today.year - age_min)
-        min_birth_date = today.replace(year=today.year - age_max - 1)
-
+    birth_date_range = _birth_date_range(user, filters)
+    if birth_date_range:
+        min_birth_date, max_birth_date = birth_date_range
         queryset = queryset.filter(
             birth_date__gte=min_birth_date,
             birth_date__lte=max_birth_date
         )
 
-    # Get candidates
-    candidates = list(queryset[:limit * 2])  # Get extra to account for filtering
+    # Apply distance filter
+    radius_km = search_radius(user)
+    if radius_km is not None:
+        queryset = queryset.filter(cell_filter(user.latitude, user.longitude, radius_km))
 
-    # Calculate compatibility for each
-    results = []
-    for candidate in candidates:
-        compatibility = calculate_full_compatibility(user, candidate)
-        results.append({
-            'user': candidate,
-            'compatibility': compatibility,
-        })
+    return queryset
+
+
+def _resonated_among(user, user_ids: List[int]) -> set:
+    """
+    Ids among `user_ids` the user has already resonated with.
+
+    Final check on scan winners: the seen-set is only a cache, and an update
+    lost to a concurrent write must not resurface a user. A stale set is
+    dropped so the next scan rebuilds it.
+    """
+    from apps.matching.models import Resonance
+
+    resonated = set(Resonance.objects.filter(
+        from_user=user,
+        to_user_id__in=user_ids,
+    ).values_list('to_user_id', flat=True))
+
+    if resonated:
+        forget_seen_set(user.id)
+    return resonated
+
+
+def get_scan_candidates(
+    user,
+    limit: int = 20,
+    filters: Optional[Dict] = None,
+    deadline: Optional[Deadline] = None,
+) -> List:
+    """
+    Get potential matches for a user.
 
-    # Sort by compatibility score
-    results.sort(key=lambda x: x['compatibility']['overall_score'], reverse=True)
+    Args:
+        user: The requesting user
+        limit: Maximum number of results
+        filters: Optional filters (age_min, age_max, gender)
+        deadline: Optional latency budget; see rank_scan_candidates
+
+    Returns:
+        List of user instances with compatibility scores
+    """
+    return [
+        {'user': candidate, 'compatibility': get_cached_compatibility(user, candidate)}
+        for _, candidate in rank_scan_candidates(user, limit, filters, deadline)
+    ]
+
+
+def rank_scan_candidates(
+    user,
+    limit: int = 20,
+    filters: Optional[Dict] = None,
+    deadline: Optional[Deadline] = None,
+) -> List[Tuple[int, Any]]:
+    """
+    Find a user's best scan candidates by score only.
+
+    First phase of get_scan_candidates, also used to fill scan feeds.
+
+    Args:
+        user: The requesting user
+        limit: Maximum number of results
+        filters: Optional filters (age_min, age_max)
+        deadline: Optional Deadline. The bucket scan visits candidates best
+            bound first and stops when it passes, returning the best found so
+            far (deadline.hit tells). Feature store scans are one vectorized
+            pass and always complete.
+
+    Returns:
+        List of (score, candidate), best first
+    """
+    store = get_feature_store()
+    if store is not None:
+        return _rank_feature_store(user, store, limit, filters)
+
+    queryset = _candidate_queryset(user, filters)
+    radius_km = search_radius(user)
+
+    seen = get_seen_set(user.id)
+
+    while True:
+        # Visit numerology buckets best-first and stop once the top `limit` is settled
+        ranked = top_k_by_buckets(
+            user, queryset, limit,
+            lambda candidate: (calculate_compatibility_score(user, candidate), None),
+            exclude=seen,
+            accept=(lambda candidate: is_within(user, candidate, radius_km)) if radius_km else None,
+            deadline=deadline,
+            only=SCORING_FIELDS,
+        )
+
+        resonated = _resonated_among(user, [candidate.id for _, _, candidate in ranked])
+        if not resonated or (deadline is not None and deadline.hit):
+            break
+        # The cached set missed some: skip them too and rank again to fill their places
+        seen = seen.union(resonated)
+
+    return [
+        (score, candidate)
+        for score, _, candidate in ranked
+        if candidate.id not in resonated
+    ]
+
+
+def _rank_feature_store(user, store, limit: int, filters: Optional[Dict] = None) -> List[Tuple[int, Any]]:
+    """
+    Rank candidates against the shared feature store, loading only the winners.
+
+    The store may lag behind recent writes, so a few extra hits are fetched and
+    re-checked against the eligibility query by primary key. If more than the
+    slack drop out, they are excluded and the store is ranked again.
+    """
+    queryset = _candidate_queryset(user, filters)
+    seen = get_seen_set(user.id)
+
+    while True:
+        ranked = store.rank(
+            user,
+            limit + FEATURE_STORE_SLACK,
+            exclude_ids=seen.ids,
+            birth_date_range=_birth_date_range(user, filters),
+            distance_km=search_radius(user),
+        )
+
+        ranked_ids = [user_id for user_id, _ in ranked]
+        candidates = queryset.in_bulk(ranked_ids)
+        for user_id in _resonated_among(user, ranked_ids):
+            candidates.pop(user_id, None)
+
+        if len(candidates) >= limit or len(ranked) < limit + FEATURE_STORE_SLACK:
+            break
+        seen = seen.union(user_id for user_id in ranked_ids if user_id not in candidates)
+
+    # Store scores can be a refresh behind; rank by the fresh ones
+    fresh = [candidates[user_id] for user_id, _ in ranked if user_id in candidates]
+    return [(score, fresh[index]) for score, index in rank_candidates(user, fresh, limit)]
+
+
+def get_aspect_candidates(user, limit: int = 20, filters: Optional[Dict] = None) -> List:
+    """
+    Get the candidates with the most harmonious planet aspects to a user's chart.
+
+    Retrieval stage alongside get_scan_candidates: candidates come from the
+    angular-bin index instead of numerology buckets, so astrology-driven
+    matches surface without scoring the whole pool. Scans select it with
+    retrieval='aspects'.
+
+    Args:
+        user: The requesting user
+        limit: Maximum number of results
+        filters: Optional filters (age_min, age_max)
+
+    Returns:
+        List of {'user', 'compatibility', 'aspect_hits'}, most hits first
+    """
+    from apps.users.models import User
+
+    queryset = _candidate_queryset(user, filters)
+    hits = get_aspect_candidate_ids(user, queryset, limit, exclude=get_seen_set(user.id))
 
-    return results[:limit]
+    hit_ids = [user_id for user_id, _ in hits]
+    users = User.objects.in_bulk(hit_ids)
+    for user_id in _resonated_among(user, hit_ids):
+        users.pop(user_id, None)
 
+    radius_km = search_radius(user)
+    if radius_km is not None:
+        users = {
+            candidate.id: candidate
+            for candidate in filter_within(user, list(users.values()), radius_km)
+        }
 
-def process_resonance(from_user, to_user, action: str) -> Tuple[bool, Optional['Match']]:
+    return [
+        {
+            'user': users[user_id],
+            'compatibility': get_cached_compatibility(user, users[user_id]),
+            'aspect_hits': aspect_hits,
+        }
+        for user_id, aspect_hits in hits
+        if user_id in users
+    ]
+
+
+def process_resonance(
+    from_user,
+    to_user,
+    action: str,
+    detail: bool = False,
+    score: Optional[int] = None,
+) -> Tuple[bool, Optional['Match']]:
     """
     Process a resonance action and check for mutual match.
 
@@ -246,14 +570,27 @@ def process_resonance(from_user, to_user, action: str) -> Tuple[bool, Optional['
         from_user: User sending the resonance
         to_user: User receiving the resonance
         action: 'resonate', 'decline', or 'maybe_later'
+        detail: Also store the full compatibility breakdown on the resonance.
+            By default only the score is calculated, and the breakdown is
+            built when a match is created.
+        score: Score already calculated for the pair, e.g. from a verified
+            scan token. Skips recalculating it.
 
     Returns:
         (is_match, match_instance or None)
     """
     from apps.matching.models import Resonance, Match
-
-    # Calculate compatibility for storage
-    compatibility = calculate_full_compatibility(from_user, to_user)
+    from apps.messaging.realtime import notify_match
+
+    # Calculate compatibility for storage; the pair was usually just scanned,
+    # so a cached breakdown is reused for the score when there is one
+    compatibility = get_cached_compatibility(from_user, to_user) if detail else None
+    if score is None:
+        cached = compatibility or peek_cached_compatibility(from_user, to_user)
+        score = (
+            cached['overall_score'] if cached
+            else calculate_compatibility_score(from_user, to_user)
+        )
 
     # Create or update resonance
     resonance, created = Resonance.objects.update_or_create(
@@ -261,14 +598,19 @@ def process_resonance(from_user, to_user, action: str) -> Tuple[bool, Optional['
         to_user=to_user,
         defaults={
             'action': action,
-            'compatibility_score': compatibility['overall_score'],
-            'compatibility_data': compatibility,
+            'compatibility_score': score,
+            'compatibility_data': (
+                compact_compatibility(compatibility, from_user, to_user)
+                if compatibility else None
+            ),
             'expires_at': (
                 timezone.now() + timedelta(days=7)
                 if action == 'maybe_later' else None
             ),
         }
     )
+    sync_inbox(from_user.id, [to_user.id])
+    transaction.on_commit(lambda: mark_seen(from_user.id, to_user.id))
 
     # Check for mutual resonance
     is_match = False
@@ -284,16 +626,194 @@ def process_resonance(from_user, to_user, action: str) -> Tuple[bool, Optional['
 
         if mutual:
             is_match = True
+
             # Create match (ensure consistent ordering)
             user1, user2 = (from_user, to_user) if from_user.id < to_user.id else (to_user, from_user)
+            compatibility = get_cached_compatibility(user1, user2)
 
-            match, _ = Match.objects.get_or_create(
+            match, created = Match.objects.get_or_create(
                 user1=user1,
                 user2=user2,
                 defaults={
-                    'compatibility_data': compatibility,
+                    'compatibility_data': compact_compatibility(compatibility, user1, user2),
                     'overall_score': compatibility['overall_score'],
                 }
             )
+            if created:
+                notify_match(match)
 
     return is_match, match
+
+
+def process_resonance_batch(from_user, items: List[Dict]) -> List[Dict]:
+    """
+    Process many resonance actions from one user at once.
+
+    All resonances are written with a single upsert, and the targets that
+    already resonated back are found with a single query. Matches for those
+    pairs are bulk-created.
+
+    The upsert commits before the mutual check when running in autocommit
+    mode (the default for requests). Of two batches crossing each other,
+    the later check then always sees both resonances. If both checks see
+    them, the unique (user1, user2) constraint drops the second match.
+
+    Args:
+        from_user: User sending the resonances
+        items: [{'target_user_id': int, 'action': str, 'scan_token': str (optional)}].
+            When a target appears more than once, its last action wins.
+
+    Returns:
+        One result per item, in order:
+        {'target_user_id', 'success', 'is_match', 'match', 'error'}
+    """
+    from apps.matching.models import Resonance, Match
+    from apps.messaging.realtime import notify_match
+    from apps.users.models import User
+    from .scan_session import read_scan_token
+
+    # Last action per target
+    actions = {item['target_user_id']: item for item in items}
+    actions.pop(from_user.id, None)
+    targets = User.objects.filter(is_active=True).in_bulk(list(actions))
+
+    now = timezone.now()
+    resonances = []
+    for target_id, item in actions.items():
+        target = targets.get(target_id)
+        if target is None:
+            continue
+
+        # Same scoring order as process_resonance: token, cache, calculation
+        score = None
+        if item.get('scan_token'):
+            score = read_scan_token(item['scan_token'], from_user, target)
+        if score is None:
+            cached = peek_cached_compatibility(from_user, target)
+            score = (
+                cached['overall_score'] if cached
+                else calculate_compatibility_score(from_user, target)
+            )
+
+        resonances.append(Resonance(
+            from_user=from_user,
+            to_user=target,
+            action=item['action'],
+            compatibility_score=score,
+            compatibility_data=None,
+            expires_at=now + timedelta(days=7) if item['action'] == 'maybe_later' else None,
+        ))
+
+    Resonance.objects.bulk_create(
+        resonances,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=['from_user', 'to_user'],
+        update_fields=['action', 'compatibility_score', 'compatibility_data', 'expires_at', 'updated_at'],
+    )
+    seen_ids = [resonance.to_user_id for resonance in resonances]
+    sync_inbox(from_user.id, seen_ids)
+    transaction.on_commit(lambda: mark_seen(from_user.id, *seen_ids))
+
+    # Targets that had already resonated back
+    resonated = [resonance.to_user_id for resonance in resonances if resonance.action == 'resonate']
+    mutual_ids = set(Resonance.objects.filter(
+        from_user_id__in=resonated,
+        to_user=from_user,
+        action='resonate',
+    ).values_list('from_user_id', flat=True)) if resonated else set()
+
+    matches = {}
+    if mutual_ids:
+        match_query = Match.objects.filter(
+            Q(user1=from_user, user2_id__in=mutual_ids) | Q(user2=from_user, user1_id__in=mutual_ids)
+        )
+        matched_ids = {
+            user2_id if user1_id == from_user.id else user1_id
+            for user1_id, user2_id in match_query.values_list('user1_id', 'user2_id')
+        }
+
+        new_matches = []
+        for target_id in mutual_ids - matched_ids:
+            target = targets[target_id]
+            # Ensure consistent ordering
+            user1, user2 = (from_user, target) if from_user.id < target.id else (target, from_user)
+            compatibility = get_cached_compatibility(user1, user2)
+            new_matches.append(Match(
+                user1=user1,
+                user2=user2,
+                compatibility_data=compact_compatibility(compatibility, user1, user2),
+                overall_score=compatibility['overall_score'],
+            ))
+        Match.objects.bulk_create(new_matches, ignore_conflicts=True)
+
+        created_ids = mutual_ids - matched_ids
+        for match in match_query.select_related('user1', 'user2'):
+            other_id = match.user2_id if match.user1_id == from_user.id else match.user1_id
+            matches[other_id] = match
+            if other_id in created_ids:
+                notify_match(match)
+
+    results = []
+    for item in items:
+        target_id = item['target_user_id']
+        result = {'target_user_id': target_id, 'success': False, 'is_match': False, 'match': None, 'error': None}
+        if target_id == from_user.id:
+            result['error'] = 'Cannot resonate with yourself'
+        elif target_id not in targets:
+            result['error'] = 'User not found'
+        else:
+            result['success'] = True
+            # Only the target's last action counts
+            if actions[target_id]['action'] == 'resonate' and target_id in matches:
+                result['is_match'] = True
+                result['match'] = matches[target_id]
+        results.append(result)
+
+    return results
+
+
+def sweep_expired_maybe_later(policy: Optional[str] = None, batch_size: Optional[int] = None) -> int:
+    """
+    Resolve maybe_later resonances whose expiry has passed.
+
+    Rows are handled in batches, each in its own transaction, so a large
+    backlog never holds long locks.
+
+    Args:
+        policy: 'release' deletes the rows, returning those users to the
+            sender's scans; 'decline' turns them into declines. Defaults to
+            MAYBE_LATER_EXPIRED_POLICY.
+        batch_size: Rows per batch, defaults to MAYBE_LATER_SWEEP_BATCH
+
+    Returns:
+        Number of rows swept
+    """
+    from apps.matching.models import Resonance
+
+    policy = policy or settings.MAYBE_LATER_EXPIRED_POLICY
+    if policy not in ('release', 'decline'):
+        raise ValueError(f'Unknown maybe_later policy: {policy}')
+    batch_size = batch_size or settings.MAYBE_LATER_SWEEP_BATCH
+
+    now = timezone.now()
+    swept = 0
+    while True:
+        with transaction.atomic():
+            ids = list(Resonance.objects.filter(
+                action='maybe_later',
+                expires_at__lte=now,
+            ).select_for_update(skip_locked=True).values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+
+            batch = Resonance.objects.filter(id__in=ids)
+            if policy == 'release':
+                # post_delete drops the senders' seen-sets
+                batch.delete()
+            else:
+                batch.update(action='decline', expires_at=None, updated_at=timezone.now())
+
+        swept += len(ids)
+
+    return swept
@@ -0,0 +1,62 @@
+"""
+Matching signal handlers - keep retrieval indexes in sync with profile and
+resonance writes.
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .aspect_index import index_user_chart
+from .feature_store import note_user_deleted
+from .feed import feed_enabled, schedule_offer, schedule_rebuild
+from .inbox import restore_incoming_like
+from .models import FeedEntry, Resonance
+from .seen_set import forget_seen_set
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def update_chart_index(sender, instance, created, update_fields=None, **kwargs):
+    """Re-index planet bins when a user's chart may have changed."""
+    if update_fields is not None and 'chart_data' not in update_fields:
+        return
+    index_user_chart(instance)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def refresh_scan_feeds(sender, instance, created, **kwargs):
+    """Keep scan feeds in step with profile and preference changes."""
+    if not feed_enabled():
+        return
+
+    changed = getattr(instance, 'changed_fields', None)
+    if not created and not changed:
+        return
+
+    # The user may now belong in (or rank differently in) other users' feeds
+    if instance.is_active and instance.is_profile_complete:
+        schedule_offer(instance.id)
+
+    # Their own feed was ranked for the old profile
+    if not created and FeedEntry.objects.filter(user=instance).exists():
+        schedule_rebuild(instance.id)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def evict_from_feature_store(sender, instance, **kwargs):
+    """Deleted users leave the scan feature store at its next refresh."""
+    if settings.SCAN_FEATURE_STORE_ENABLED:
+        transaction.on_commit(note_user_deleted)
+
+
+@receiver(post_delete, sender=Resonance)
+def drop_seen_set(sender, instance, **kwargs):
+    """A deleted resonance makes its target scannable again."""
+    forget_seen_set(instance.from_user_id)
+
+
+@receiver(post_delete, sender=Resonance)
+def update_inbox(sender, instance, **kwargs):
+    """A deleted response makes the other side's like pending again."""
+    restore_incoming_like(instance)
@@ -0,0 +1,95 @@
+"""
+The match list and detail endpoints run a fixed number of queries.
+
+A count that grows usually means a serializer started reading a relation
+that the view does not select_related.
+"""
+
+from datetime import date
+
+import pytest
+from rest_framework.settings import api_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.matching.models import Match
+from apps.matching.views import MatchDetailView, MatchListView
+from apps.users.models import User
+
+# Page count + the page's matches joined to both users
+LIST_QUERIES = 2
+# The match joined to both users
+DETAIL_QUERIES = 1
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def users():
+    return User.objects.bulk_create([
+        User(
+            email=f'match-queries-{index}@example.com',
+            display_name=f'User {index}',
+            birth_date=date(1990, 1 + index % 12, 1 + index % 28),
+            life_path=1 + index % 9,
+            soul_urge=11,
+            expression=3,
+            personality=22,
+            sun_sign='Leo',
+            is_profile_complete=True,
+        )
+        for index in range(api_settings.PAGE_SIZE + 1)
+    ])
+
+
+@pytest.fixture
+def match(users):
+    return Match.objects.create(
+        user1=users[0], user2=users[1], compatibility_data={}, overall_score=80,
+    )
+
+
+@pytest.fixture
+def full_page(users, match):
+    owner, _, *others = users
+    Match.objects.bulk_create([
+        Match(user1=other, user2=owner, compatibility_data={}, overall_score=70)
+        for other in others
+    ])
+    return api_settings.PAGE_SIZE
+
+
+def _get(view_class, user, path: str, params=None, **kwargs):
+    request = APIRequestFactory().get(path, params or {})
+    force_authenticate(request, user=user)
+    response = view_class.as_view()(request, **kwargs)
+    response.render()
+    assert response.status_code == 200
+    return response
+
+
+@pytest.mark.parametrize('params', [{}, {'omit': 'chart'}])
+def test_list_one_match(django_assert_num_queries, users, match, params):
+    with django_assert_num_queries(LIST_QUERIES):
+        response = _get(MatchListView, users[0], '/matches/', params)
+    assert len(response.data['results']) == 1
+
+
+@pytest.mark.parametrize('params', [{}, {'omit': 'chart'}])
+def test_list_full_page(django_assert_num_queries, users, full_page, params):
+    with django_assert_num_queries(LIST_QUERIES):
+        response = _get(MatchListView, users[0], '/matches/', params)
+    assert len(response.data['results']) == full_page
+
+
+@pytest.mark.parametrize('params', [{}, {'omit': 'chart'}])
+def test_detail(django_assert_num_queries, users, match, params):
+    with django_assert_num_queries(DETAIL_QUERIES):
+        _get(MatchDetailView, users[0], f'/matches/{match.id}/', params, pk=match.id)
+
+
+def test_chart_included_unless_omitted(users, match):
+    astrology = _get(MatchListView, users[0], '/matches/').data['results'][0]['other_user']['astrology']
+    assert 'chart_data' in astrology
+
+    response = _get(MatchListView, users[0], '/matches/', {'omit': 'chart'})
+    assert 'chart_data' not in response.data['results'][0]['other_user']['astrology']
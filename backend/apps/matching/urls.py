@@ -7,9 +7,11 @@ from .views import (
     ScanView,
     EvaluateView,
     ResonanceView,
+    ResonanceBatchView,
     MatchListView,
     MatchDetailView,
     IncomingResonancesView,
+    IncomingCountView,
     MaybeLaterView,
     ConvertMaybeLaterView,
 )
@@ -21,7 +23,9 @@ urlpatterns = [
 
     # Resonance endpoints
     path('resonance/', ResonanceView.as_view(), name='resonance'),
+    path('resonances/batch/', ResonanceBatchView.as_view(), name='resonances-batch'),
     path('resonances/incoming/', IncomingResonancesView.as_view(), name='resonances-incoming'),
+    path('resonances/incoming/count/', IncomingCountView.as_view(), name='resonances-incoming-count'),
     path('resonances/maybe-later/', MaybeLaterView.as_view(), name='resonances-maybe-later'),
     path('resonances/maybe-later/<int:pk>/convert/', ConvertMaybeLaterView.as_view(), name='resonances-convert'),
 
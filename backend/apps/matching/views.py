@@ -11,13 +11,14 @@ from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.db.models import Q
 
-from .models import Resonance, Match
+from .models import IncomingLike, Resonance, Match
 from .serializers import (
     ScanRequestSerializer,
     ScanResultSerializer,
     EvaluateRequestSerializer,
     EvaluateResponseSerializer,
     ResonanceRequestSerializer,
+    ResonanceBatchRequestSerializer,
     ResonanceResponseSerializer,
     MatchSerializer,
     MatchDetailSerializer,
@@ -26,11 +27,13 @@ from .serializers import (
     MatchUserSerializer,
     CompatibilitySerializer,
 )
-from .services import (
-    get_scan_candidates,
-    calculate_full_compatibility,
-    process_resonance,
-)
+from .compat_cache import get_cached_compatibility
+from .inbox import forget_inbox_count, inbox_count
+from .scan_session import get_scan_page, read_scan_token, start_scan_session
+from .seen_set import get_seen_set
+from .services import process_resonance, process_resonance_batch
+from core.fieldsets import SparseFieldsetViewMixin
+from core.pagination import StandardCursorPagination
 from core.permissions import IsProfileComplete
 
 User = get_user_model()
@@ -57,16 +60,29 @@ class ScanView(APIView):
         # Remove None values
         filters = {k: v for k, v in filters.items() if v is not None}
 
-        # Get candidates with compatibility
-        candidates = get_scan_candidates(
-            user=request.user,
-            limit=limit,
-            filters=filters if filters else None
-        )
+        cursor = serializer.validated_data.get('cursor')
+        if cursor:
+            # Next page of an earlier scan - served from its session, no rescoring
+            page = get_scan_page(request.user, cursor, limit)
+            if page is None:
+                return Response(
+                    {'error': 'Scan session expired, start a new scan'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            candidates, next_cursor = page
+            partial = False
+        else:
+            # Get candidates with compatibility, within the scan latency budget
+            candidates, next_cursor, partial = start_scan_session(
+                request.user,
+                limit,
+                filters if filters else None,
+                retrieval=serializer.validated_data['retrieval'],
+            )
 
-        # Update user's last scan time
-        request.user.last_scan_at = timezone.now()
-        request.user.save(update_fields=['last_scan_at'])
+            # Update user's last scan time
+            request.user.last_scan_at = timezone.now()
+            request.user.save(update_fields=['last_scan_at'])
 
         # Serialize results
         results = []
@@ -74,12 +90,15 @@ class ScanView(APIView):
             results.append({
                 'user': candidate['user'],
                 'compatibility': candidate['compatibility'],
+                'scan_token': candidate['scan_token'],
             })
 
         return Response({
             'profiles': ScanResultSerializer(results, many=True).data,
             'count': len(results),
-            'has_more': len(candidates) >= limit,
+            'has_more': next_cursor is not None,
+            'cursor': next_cursor,
+            'partial': partial,
         })
 
 
@@ -99,8 +118,8 @@ class EvaluateView(APIView):
         target_user_id = serializer.validated_data['target_user_id']
         target_user = get_object_or_404(User, id=target_user_id, is_active=True)
 
-        # Calculate full compatibility
-        compatibility = calculate_full_compatibility(request.user, target_user)
+        # Full compatibility, usually cached from the scan that surfaced the user
+        compatibility = get_cached_compatibility(request.user, target_user)
 
         return Response({
             'profile': MatchUserSerializer(target_user).data,
@@ -133,8 +152,14 @@ class ResonanceView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        # Reuse the score from the scan when the client sent a valid token
+        score = None
+        token = serializer.validated_data.get('scan_token')
+        if token:
+            score = read_scan_token(token, request.user, target_user)
+
         # Process the resonance
-        is_match, match = process_resonance(request.user, target_user, action)
+        is_match, match = process_resonance(request.user, target_user, action, score=score)
 
         response_data = {
             'success': True,
@@ -151,19 +176,44 @@ class ResonanceView(APIView):
         return Response(response_data)
 
 
-class MatchListView(generics.ListAPIView):
+class ResonanceBatchView(APIView):
     """
-    List all matches for the current user.
+    Send many resonance actions at once.
 
-    GET /api/v1/matches/
+    POST /api/v1/resonances/batch/
+    Returns one result per action, with match info where mutual.
     """
     permission_classes = [IsAuthenticated]
-    serializer_class = MatchSerializer
+
+    def post(self, request):
+        serializer = ResonanceBatchRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = process_resonance_batch(request.user, serializer.validated_data['resonances'])
+
+        for result in results:
+            if result['match']:
+                result['match'] = MatchSerializer(
+                    result['match'],
+                    context={'request': request}
+                ).data
+
+        return Response({'results': results})
+
+
+class MatchViewMixin(SparseFieldsetViewMixin):
+    """
+    Current user's matches with both users loaded in the same query.
+
+    Only the columns the requested fields read are loaded; users' chart_data
+    is skipped with ?omit=chart.
+    """
 
     def get_queryset(self):
-        return Match.objects.filter(
+        queryset = Match.objects.filter(
             Q(user1=self.request.user) | Q(user2=self.request.user)
-        ).order_by('-created_at')
+        ).select_related('user1', 'user2')
+        return self.project(queryset, 'user1', 'user2')
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -171,48 +221,67 @@ class MatchListView(generics.ListAPIView):
         return context
 
 
-class MatchDetailView(generics.RetrieveAPIView):
+class MatchListView(MatchViewMixin, generics.ListAPIView):
     """
-    Get match detail with full compatibility breakdown.
+    List all matches for the current user.
 
-    GET /api/v1/matches/{id}/
+    GET /api/v1/matches/
     """
     permission_classes = [IsAuthenticated]
-    serializer_class = MatchDetailSerializer
+    serializer_class = MatchSerializer
 
     def get_queryset(self):
-        return Match.objects.filter(
-            Q(user1=self.request.user) | Q(user2=self.request.user)
-        )
+        return super().get_queryset().order_by('-created_at')
 
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        context['request'] = self.request
-        return context
+
+class MatchDetailView(MatchViewMixin, generics.RetrieveAPIView):
+    """
+    Get match detail with full compatibility breakdown.
+
+    GET /api/v1/matches/{id}/
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = MatchDetailSerializer
 
 
 class IncomingResonancesView(generics.ListAPIView):
     """
-    List incoming resonances (people who liked you).
+    List incoming resonances (people who liked you), newest first.
 
     GET /api/v1/resonances/incoming/
     """
     permission_classes = [IsAuthenticated]
     serializer_class = IncomingResonanceSerializer
+    pagination_class = StandardCursorPagination
 
     def get_queryset(self):
-        # Get resonances where others have resonated with current user
-        # but current user hasn't responded yet
-        responded_ids = Resonance.objects.filter(
-            from_user=self.request.user
-        ).values_list('to_user_id', flat=True)
+        # Inbox rows only exist while the current user hasn't responded
+        return IncomingLike.objects.filter(
+            user=self.request.user
+        ).select_related('from_user')
 
-        return Resonance.objects.filter(
-            to_user=self.request.user,
-            action='resonate'
-        ).exclude(
-            from_user_id__in=responded_ids
-        ).order_by('-created_at')
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+
+        # A response racing the like's write can leave a row behind
+        seen = get_seen_set(self.request.user.id)
+        stale = [like.resonance_id for like in page if like.from_user_id in seen]
+        if stale:
+            IncomingLike.objects.filter(resonance_id__in=stale).delete()
+            forget_inbox_count(self.request.user.id)
+        return [like for like in page if like.from_user_id not in seen]
+
+
+class IncomingCountView(APIView):
+    """
+    Number of pending incoming resonances, for badges.
+
+    GET /api/v1/resonances/incoming/count/
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response({'count': inbox_count(request.user.id)})
 
 
 class MaybeLaterView(generics.ListAPIView):
@@ -4,7 +4,7 @@ from .models import Message
 
 @admin.register(Message)
 class MessageAdmin(admin.ModelAdmin):
-    list_display = ('match', 'sender', 'content_preview', 'read_at', 'created_at')
+    list_display = ('match', 'sender', 'content_preview', 'created_at')
     list_filter = ('created_at',)
     search_fields = ('sender__email', 'content')
     ordering = ('-created_at',)
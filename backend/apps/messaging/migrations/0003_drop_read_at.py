@@ -0,0 +1,19 @@
+# Generated by Django 6.1.2 on 2026-10-19 03:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0002_initial'),
+        # Read watermarks are backfilled from read_at first
+        ('matching', '0008_read_watermarks'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='message',
+            name='read_at',
+        ),
+    ]
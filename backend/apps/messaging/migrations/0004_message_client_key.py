@@ -0,0 +1,25 @@
+# Generated by Django 6.1.2 on 2026-10-19 03:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0008_read_watermarks'),
+        ('messaging', '0003_drop_read_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='client_key',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='message',
+            constraint=models.UniqueConstraint(condition=models.Q(('client_key__isnull', False)), fields=('match', 'sender', 'client_key'), name='messages_client_key_unique'),
+        ),
+    ]
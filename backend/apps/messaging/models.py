@@ -20,8 +20,10 @@ class Message(models.Model):
         related_name='sent_messages'
     )
     content = models.TextField(max_length=2000)
+    # Client-generated idempotency key; a replayed send returns the stored message
+    client_key = models.CharField(max_length=64, null=True, blank=True)
 
-    read_at = models.DateTimeField(null=True, blank=True)
+    # Read state lives on the match as per-user watermarks (Match.message_read_at)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -31,6 +33,13 @@ class Message(models.Model):
             models.Index(fields=['match', 'created_at']),
             models.Index(fields=['sender', 'created_at']),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['match', 'sender', 'client_key'],
+                condition=models.Q(client_key__isnull=False),
+                name='messages_client_key_unique',
+            ),
+        ]
 
     def __str__(self):
         return f"Message from {self.sender} in match {self.match_id}"
@@ -0,0 +1,233 @@
+"""
+Real-time chat events.
+
+Connected clients (apps.messaging.websocket) subscribe to a broker under
+their user id. Services publish events to the users they concern once the
+writing transaction commits:
+
+    {"type": "message", "match_id": 1, "message": {...}}
+    {"type": "read", "match_id": 1, "user_id": 2, "last_read_message_id": 40, "last_read_at": "..."}
+    {"type": "match", "match": {"id": 1, "other_user": {...}, "overall_score": 81, "created_at": "..."}}
+    {"type": "resync"}
+
+Each connection buffers at most REALTIME_SEND_BUFFER events. When a client
+falls further behind than that, its buffer is replaced by a single resync
+event, and it should catch up over REST (messages ?after=, conversations).
+
+REALTIME_BROKER picks the backend. LocalBroker delivers within this process,
+for tests and single-node ASGI deployments. ChannelLayerBroker goes through
+the channels layer (the `prod` extra), so any process can reach any
+connection.
+"""
+
+import asyncio
+import threading
+from typing import Dict, Iterable, Optional, Set
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+try:
+    from asgiref.sync import async_to_sync
+    from channels.layers import get_channel_layer
+    CHANNELS_AVAILABLE = True
+except ImportError:
+    CHANNELS_AVAILABLE = False
+
+RESYNC = {'type': 'resync'}
+
+_broker: Optional['Broker'] = None
+_broker_lock = threading.Lock()
+
+
+class Subscription:
+    """
+    One connection's bounded event buffer.
+
+    Events are offered on the connection's event loop; get() waits for the
+    next one.
+    """
+
+    def __init__(self, user_id: int, size: int, loop: asyncio.AbstractEventLoop):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(size, 1))
+        self.overflowed = False
+
+    def offer(self, event: Dict):
+        """Buffer an event. Runs on the connection's loop."""
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too far behind for the buffered events to be worth sending:
+            # drop them and have the client catch up over REST
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            self.overflowed = True
+
+    def offer_threadsafe(self, event: Dict):
+        """Buffer an event from any thread."""
+        self.loop.call_soon_threadsafe(self.offer, event)
+
+    async def get(self) -> Dict:
+        event = await self.queue.get()
+        if event is RESYNC:
+            self.overflowed = False
+        return event
+
+
+class Broker:
+    """Delivers published events to subscribed connections."""
+
+    async def subscribe(self, user_id: int) -> Subscription:
+        raise NotImplementedError
+
+    async def unsubscribe(self, subscription: Subscription):
+        raise NotImplementedError
+
+    def publish(self, user_id: int, event: Dict):
+        """Send an event to all of a user's connections. Called from sync code."""
+        raise NotImplementedError
+
+
+class LocalBroker(Broker):
+    """In-process broker: only reaches connections served by this process."""
+
+    def __init__(self):
+        self._subscriptions: Dict[int, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    async def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id, settings.REALTIME_SEND_BUFFER, asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    async def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def publish(self, user_id: int, event: Dict):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.offer_threadsafe(event)
+            except RuntimeError:
+                # Its loop has shut down; the connection unsubscribes as it closes
+                pass
+
+
+class ChannelLayerBroker(Broker):
+    """
+    Broker on the channels layer (CHANNEL_LAYERS), one group per user.
+
+    Each connection reads its layer channel into its Subscription, so the
+    same buffer limits apply.
+    """
+
+    def __init__(self):
+        if not CHANNELS_AVAILABLE:
+            raise ImproperlyConfigured('ChannelLayerBroker needs channels (the `prod` extra)')
+        self.layer = get_channel_layer()
+        if self.layer is None:
+            raise ImproperlyConfigured('ChannelLayerBroker needs CHANNEL_LAYERS to be configured')
+        self._readers: Dict[Subscription, tuple] = {}
+
+    @staticmethod
+    def group(user_id: int) -> str:
+        return f'realtime.user.{user_id}'
+
+    async def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id, settings.REALTIME_SEND_BUFFER, asyncio.get_running_loop())
+        channel = await self.layer.new_channel()
+        await self.layer.group_add(self.group(user_id), channel)
+        reader = asyncio.create_task(self._read(channel, subscription))
+        self._readers[subscription] = (channel, reader)
+        return subscription
+
+    async def _read(self, channel: str, subscription: Subscription):
+        while True:
+            message = await self.layer.receive(channel)
+            subscription.offer(message['event'])
+
+    async def unsubscribe(self, subscription: Subscription):
+        channel, reader = self._readers.pop(subscription)
+        reader.cancel()
+        await self.layer.group_discard(self.group(subscription.user_id), channel)
+
+    def publish(self, user_id: int, event: Dict):
+        async_to_sync(self.layer.group_send)(
+            self.group(user_id),
+            {'type': 'realtime.event', 'event': event},
+        )
+
+
+def get_broker() -> Broker:
+    """The process-wide broker configured by REALTIME_BROKER."""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(settings.REALTIME_BROKER)()
+    return _broker
+
+
+def publish(user_ids: Iterable[int], event: Dict):
+    """Send an event to the users' connections once the current transaction commits."""
+    user_ids = list(user_ids)
+
+    def send():
+        broker = get_broker()
+        for user_id in user_ids:
+            broker.publish(user_id, event)
+
+    transaction.on_commit(send, robust=True)
+
+
+def notify_message(match, message):
+    """Publish a new message to both participants."""
+    from .serializers import MessageSerializer
+
+    data = MessageSerializer(message, context={'match': match}).data
+    for user_id in (match.user1_id, match.user2_id):
+        publish([user_id], {
+            'type': 'message',
+            'match_id': match.id,
+            'message': {**data, 'is_mine': message.sender_id == user_id},
+        })
+
+
+def notify_read(match, user, last_read_message_id: int, last_read_at):
+    """Publish a user's new read watermark to both participants."""
+    publish([match.user1_id, match.user2_id], {
+        'type': 'read',
+        'match_id': match.id,
+        'user_id': user.id,
+        'last_read_message_id': last_read_message_id,
+        'last_read_at': last_read_at.isoformat(),
+    })
+
+
+def notify_match(match):
+    """Publish a new match to both users. Expects user1 and user2 loaded."""
+    from .serializers import MessageSenderSerializer
+
+    for user, other_user in ((match.user1, match.user2), (match.user2, match.user1)):
+        publish([user.id], {
+            'type': 'match',
+            'match': {
+                'id': match.id,
+                'other_user': MessageSenderSerializer(other_user).data,
+                'overall_score': match.overall_score,
+                'created_at': match.created_at.isoformat(),
+            },
+        })
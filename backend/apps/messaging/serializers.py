@@ -2,15 +2,18 @@
 Messaging serializers for API responses.
 """
 
+from django.utils.functional import cached_property
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 
+from core.compiled import CompiledSerializerMixin
+
 from .models import Message
 
 User = get_user_model()
 
 
-class MessageSenderSerializer(serializers.ModelSerializer):
+class MessageSenderSerializer(CompiledSerializerMixin, serializers.ModelSerializer):
     """Minimal user info for message sender."""
 
     class Meta:
@@ -18,18 +21,24 @@ class MessageSenderSerializer(serializers.ModelSerializer):
         fields = ['id', 'display_name', 'photos']
 
 
-class MessageSerializer(serializers.ModelSerializer):
-    """Serializer for Message model."""
+class MessageSerializer(CompiledSerializerMixin, serializers.ModelSerializer):
+    """
+    Serializer for Message model.
+
+    read_at comes from the match's read watermarks; pass the match as
+    context['match'] to avoid loading it per message.
+    """
     sender = MessageSenderSerializer(read_only=True)
     is_mine = serializers.SerializerMethodField()
+    read_at = serializers.SerializerMethodField()
 
     class Meta:
         model = Message
         fields = [
-            'id', 'sender', 'content',
+            'id', 'sender', 'content', 'client_key',
             'is_mine', 'read_at', 'created_at',
         ]
-        read_only_fields = ['id', 'sender', 'read_at', 'created_at']
+        read_only_fields = ['id', 'sender', 'client_key', 'created_at']
 
     def get_is_mine(self, obj):
         request = self.context.get('request')
@@ -37,16 +46,65 @@ class MessageSerializer(serializers.ModelSerializer):
             return obj.sender_id == request.user.id
         return False
 
+    def get_read_at(self, obj):
+        match = self.context.get('match') or obj.match
+        read_at = match.message_read_at(obj)
+        return None if read_at is None else self._datetime_field.to_representation(read_at)
+
+    @cached_property
+    def _datetime_field(self):
+        return serializers.DateTimeField()
+
 
 class MessageCreateSerializer(serializers.Serializer):
     """Serializer for creating a new message."""
     content = serializers.CharField(max_length=2000, min_length=1)
 
 
+class MessageBatchItemSerializer(MessageCreateSerializer):
+    """One message of a batch send, with its idempotency key."""
+    client_key = serializers.CharField(max_length=64)
+
+
+class MessageBatchSerializer(serializers.Serializer):
+    """Serializer for sending a batch of queued messages."""
+    messages = MessageBatchItemSerializer(many=True, allow_empty=False, max_length=100)
+
+
 class ConversationSerializer(serializers.Serializer):
-    """Serializer for conversation metadata."""
-    match_id = serializers.IntegerField()
-    other_user = MessageSenderSerializer()
-    last_message = MessageSerializer(allow_null=True)
-    unread_count = serializers.IntegerField()
+    """
+    Serializer for conversation metadata, read from a Match.
+
+    Expects user1, user2 and last_message to be loaded with the match.
+    """
+    match_id = serializers.IntegerField(source='id')
+    other_user = serializers.SerializerMethodField()
+    last_message = serializers.SerializerMethodField()
+    last_message_preview = serializers.CharField()
+    unread_count = serializers.SerializerMethodField()
     is_conversation_started = serializers.BooleanField()
+
+    @cached_property
+    def _sender_serializer(self):
+        return MessageSenderSerializer(context=self.context)
+
+    @cached_property
+    def _message_serializer(self):
+        return MessageSerializer(context=self.context)
+
+    def get_other_user(self, obj):
+        return self._sender_serializer.to_representation(
+            obj.get_other_user(self.context['request'].user)
+        )
+
+    def get_last_message(self, obj):
+        message = obj.last_message
+        if message is None:
+            return None
+        # The sender is one of the match's users, already loaded
+        message.sender = obj.user1 if message.sender_id == obj.user1_id else obj.user2
+        message.match = obj
+        return self._message_serializer.to_representation(message)
+
+    def get_unread_count(self, obj):
+        return obj.get_unread_count(self.context['request'].user)
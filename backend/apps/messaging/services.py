@@ -0,0 +1,206 @@
+"""
+Messaging services - keep a match's denormalized conversation state in step
+with its messages.
+
+Match stores its last message (id, preview, time), an unread counter and a
+read watermark per participant, so conversation lists need no per-match
+queries and reading a conversation writes one row. Every write goes through
+a single UPDATE with database-side expressions or a compare-and-set on the
+watermark, so concurrent sends and reads never overwrite each other's
+changes. Both are pushed to connected
+clients (apps.messaging.realtime).
+"""
+
+from typing import Dict, List, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import BigIntegerField, Case, F, Q, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .realtime import notify_message, notify_read
+
+PREVIEW_LENGTH = 100
+
+
+def record_message(match, message):
+    """
+    Update a match after a message was sent in it.
+
+    The recipient's unread counter goes up by one. The last message fields
+    only move forward, so a slower concurrent send can't replace a newer one.
+    """
+    record_messages(match, [message])
+
+
+def record_messages(match, messages: List):
+    """
+    Update a match after messages from one sender were added to it, in one
+    UPDATE.
+
+    The recipient's unread counter goes up by the number of messages; the
+    newest becomes the last message, and sets the match's activity time,
+    unless a newer one is already recorded.
+    """
+    from apps.matching.models import Match
+
+    if not messages:
+        return
+
+    message = max(messages, key=lambda item: (item.created_at, item.id))
+    recipient_unread = 'user2_unread_count' if message.sender_id == match.user1_id else 'user1_unread_count'
+    newer = Q(last_message_at__isnull=True) | Q(last_message_at__lte=message.created_at)
+
+    Match.objects.filter(id=match.id).update(
+        is_conversation_started=True,
+        last_message=Case(
+            When(newer, then=Value(message.id)),
+            default=F('last_message'),
+            output_field=BigIntegerField(),
+        ),
+        last_message_at=Case(When(newer, then=Value(message.created_at)), default=F('last_message_at')),
+        activity_at=Case(When(newer, then=Value(message.created_at)), default=F('activity_at')),
+        last_message_preview=Case(
+            When(newer, then=Value(message.content[:PREVIEW_LENGTH])),
+            default=F('last_message_preview'),
+        ),
+        **{recipient_unread: F(recipient_unread) + len(messages)},
+    )
+    for message in messages:
+        notify_message(match, message)
+
+
+def send_messages(match, sender, items: List[Dict]) -> Tuple[List, int]:
+    """
+    Send a batch of messages with client idempotency keys.
+
+    Keys already stored for this match and sender return the stored
+    message instead of a new one, so replaying a batch is safe. Within a
+    batch the first item with a key wins. The match is updated from the
+    rows this call inserted, so concurrent replays of the same keys never
+    count a message twice, whatever the database's locking.
+
+    Args:
+        match: Match the sender is a participant of
+        sender: User sending the messages
+        items: [{'client_key', 'content'}] in send order
+
+    Returns:
+        (the message for each item in order, number of messages created)
+    """
+    from .models import Message
+
+    contents: Dict[str, str] = {}
+    for item in items:
+        contents.setdefault(item['client_key'], item['content'])
+    keys = list(contents)
+    stored = Message.objects.filter(match=match, sender=sender)
+
+    with transaction.atomic():
+        messages = {message.client_key: message for message in stored.filter(client_key__in=keys)}
+        created = _insert_messages([
+            Message(match=match, sender=sender, client_key=key, content=contents[key])
+            for key in keys
+            if key not in messages
+        ])
+        for message in created:
+            messages[message.client_key] = message
+
+        # Keys a concurrent replay stored after the read above
+        missing = [key for key in keys if key not in messages]
+        if missing:
+            for message in stored.filter(client_key__in=missing):
+                message.sender = sender
+                messages[message.client_key] = message
+
+        record_messages(match, created)
+
+    return [messages[item['client_key']] for item in items], len(created)
+
+
+def _insert_messages(messages: List) -> List:
+    """
+    Insert new keyed messages, skipping keys stored in the meantime.
+
+    One INSERT when no key conflicts; otherwise one per message, so the
+    result is exactly the rows this call inserted.
+
+    Returns:
+        The inserted messages, with their ids
+    """
+    from .models import Message
+
+    if not messages:
+        return []
+
+    try:
+        with transaction.atomic():
+            return Message.objects.bulk_create(messages)
+    except IntegrityError:
+        pass
+
+    created = []
+    for message in messages:
+        try:
+            with transaction.atomic():
+                Message.objects.bulk_create([message])
+        except IntegrityError:
+            continue
+        created.append(message)
+    return created
+
+
+def mark_read(match, user) -> int:
+    """
+    Mark the other participant's messages in a match as read by `user`.
+
+    Moves the user's read watermark up to the match's last message and
+    lowers their unread counter by the messages it passed, in one
+    conditional UPDATE of the match row; message rows are never written.
+    The UPDATE only applies while the stored watermark is the one the
+    messages were counted from, so concurrent reads never subtract twice.
+    The instance's watermark is updated too.
+
+    Returns:
+        Number of messages this call marked read; 0 when the watermark was
+        already there, or another read moved it there first
+    """
+    from apps.matching.models import Match
+
+    from .models import Message
+
+    side = match.side(user)
+    watermark = f'{side}_last_read_message_id'
+    unread = f'{side}_unread_count'
+
+    latest = match.last_message_id
+    stored = getattr(match, watermark)
+    now = timezone.now()
+
+    while True:
+        if latest is None or stored is None or latest <= stored:
+            return 0
+
+        passed = Message.objects.filter(
+            match=match,
+            id__gt=stored,
+            id__lte=latest,
+        ).exclude(sender=user).count()
+
+        moved = Match.objects.filter(id=match.id, **{watermark: stored}).update(**{
+            watermark: latest,
+            f'{side}_last_read_at': now,
+            unread: Greatest(F(unread) - passed, 0),
+        })
+        if moved:
+            break
+
+        # Another read moved the watermark since it was loaded; count from where it is now
+        stored = Match.objects.filter(id=match.id).values_list(watermark, flat=True).first()
+
+    # Serializers derive read_at from the watermark on this instance
+    setattr(match, watermark, latest)
+    setattr(match, f'{side}_last_read_at', now)
+    setattr(match, unread, max(getattr(match, unread) - passed, 0))
+    notify_read(match, user, latest, now)
+    return passed
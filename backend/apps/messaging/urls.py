@@ -6,6 +6,7 @@ from django.urls import path
 from .views import (
     MessageListView,
     MessageCreateView,
+    MessageBatchCreateView,
     ConversationListView,
     MarkReadView,
 )
@@ -17,5 +18,6 @@ urlpatterns = [
     # Messages for a specific match
     path('matches/<int:match_id>/messages/', MessageListView.as_view(), name='message-list'),
     path('matches/<int:match_id>/messages/send/', MessageCreateView.as_view(), name='message-create'),
+    path('matches/<int:match_id>/messages/batch/', MessageBatchCreateView.as_view(), name='message-batch-create'),
     path('matches/<int:match_id>/messages/read/', MarkReadView.as_view(), name='message-mark-read'),
 ]
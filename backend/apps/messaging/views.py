@@ -7,17 +7,28 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
-from django.utils import timezone
-from django.db.models import Q, Count
+from django.db.models import Q
 
 from apps.matching.models import Match
 from .models import Message
 from .serializers import (
     MessageSerializer,
     MessageCreateSerializer,
+    MessageBatchSerializer,
     ConversationSerializer,
     MessageSenderSerializer,
 )
+from .services import mark_read, record_message, send_messages
+from core.pagination import ConversationPagination, MessagePagination
+
+# Columns read by ConversationSerializer and ConversationPagination
+CONVERSATION_COLUMNS = (
+    'id', 'user1', 'user2', 'last_message', 'last_message_at', 'last_message_preview',
+    'user1_unread_count', 'user2_unread_count', 'is_conversation_started', 'activity_at',
+    'user1_last_read_message_id', 'user1_last_read_at',
+    'user2_last_read_message_id', 'user2_last_read_at',
+)
+LAST_MESSAGE_COLUMNS = ('id', 'match', 'sender', 'content', 'client_key', 'created_at')
 
 
 class MessageListView(generics.ListAPIView):
@@ -25,24 +36,34 @@ class MessageListView(generics.ListAPIView):
     List messages for a match conversation.
 
     GET /api/v1/matches/{match_id}/messages/
-    Returns paginated messages, oldest first.
+    Returns the newest page of messages, oldest first; ?before= pages back
+    and ?after= syncs newer messages.
     """
     permission_classes = [IsAuthenticated]
     serializer_class = MessageSerializer
+    pagination_class = MessagePagination
 
     def get_match(self):
         """Get match and verify user is a participant."""
-        match = get_object_or_404(Match, id=self.kwargs['match_id'])
-        if match.user1_id != self.request.user.id and match.user2_id != self.request.user.id:
-            return None
-        return match
+        if not hasattr(self, '_match'):
+            match = get_object_or_404(Match, id=self.kwargs['match_id'])
+            if match.user1_id != self.request.user.id and match.user2_id != self.request.user.id:
+                match = None
+            self._match = match
+        return self._match
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['match'] = self.get_match()
+        return context
 
     def get_queryset(self):
         match = self.get_match()
         if not match:
             return Message.objects.none()
 
-        return Message.objects.filter(match=match).order_by('created_at')
+        # Ordering comes from MessagePagination's (created_at, id) keyset
+        return Message.objects.filter(match=match).select_related('sender')
 
     def list(self, request, *args, **kwargs):
         match = self.get_match()
@@ -52,13 +73,8 @@ class MessageListView(generics.ListAPIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # Mark unread messages as read
-        Message.objects.filter(
-            match=match,
-            read_at__isnull=True
-        ).exclude(
-            sender=request.user
-        ).update(read_at=timezone.now())
+        # Move the user's read watermark (no write when nothing is new)
+        mark_read(match, request.user)
 
         return super().list(request, *args, **kwargs)
 
@@ -91,11 +107,8 @@ class MessageCreateView(APIView):
             content=serializer.validated_data['content'],
         )
 
-        # Update match conversation status
-        if not match.is_conversation_started:
-            match.is_conversation_started = True
-        match.last_message_at = message.created_at
-        match.save(update_fields=['is_conversation_started', 'last_message_at'])
+        # Update match conversation status, last message and unread count
+        record_message(match, message)
 
         return Response(
             MessageSerializer(message, context={'request': request}).data,
@@ -103,53 +116,64 @@ class MessageCreateView(APIView):
         )
 
 
-class ConversationListView(APIView):
+class MessageBatchCreateView(APIView):
+    """
+    Send queued messages in a match conversation at once.
+
+    POST /api/v1/matches/{match_id}/messages/batch/
+    Each message carries a client_key; replayed keys return the stored
+    message instead of sending it again.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, match_id):
+        match = get_object_or_404(Match, id=match_id)
+        if match.user1_id != request.user.id and match.user2_id != request.user.id:
+            return Response(
+                {'error': 'Match not found or access denied'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        serializer = MessageBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        messages, created = send_messages(match, request.user, serializer.validated_data['messages'])
+
+        return Response(
+            {
+                'messages': MessageSerializer(
+                    messages,
+                    many=True,
+                    context={'request': request, 'match': match}
+                ).data,
+                'created': created,
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+
+class ConversationListView(generics.ListAPIView):
     """
     List all conversations (matches with message metadata).
 
     GET /api/v1/conversations/
-    Returns matches with last message and unread count.
+    Returns matches with last message and unread count, most recent activity
+    first, from one query per page plus a count.
     """
     permission_classes = [IsAuthenticated]
+    serializer_class = ConversationSerializer
+    pagination_class = ConversationPagination
 
-    def get(self, request):
-        # Get user's matches
-        matches = Match.objects.filter(
-            Q(user1=request.user) | Q(user2=request.user)
-        ).order_by('-last_message_at', '-created_at')
-
-        conversations = []
-        for match in matches:
-            other_user = match.get_other_user(request.user)
-
-            # Get last message
-            last_message = Message.objects.filter(
-                match=match
-            ).order_by('-created_at').first()
-
-            # Count unread messages
-            unread_count = Message.objects.filter(
-                match=match,
-                read_at__isnull=True
-            ).exclude(
-                sender=request.user
-            ).count()
-
-            conversations.append({
-                'match_id': match.id,
-                'other_user': MessageSenderSerializer(other_user).data,
-                'last_message': MessageSerializer(
-                    last_message,
-                    context={'request': request}
-                ).data if last_message else None,
-                'unread_count': unread_count,
-                'is_conversation_started': match.is_conversation_started,
-            })
-
-        return Response({
-            'conversations': conversations,
-            'count': len(conversations),
-        })
+    def get_queryset(self):
+        return Match.objects.filter(
+            Q(user1=self.request.user) | Q(user2=self.request.user)
+        ).select_related(
+            'user1', 'user2', 'last_message'
+        ).only(
+            *CONVERSATION_COLUMNS,
+            *(f'{side}__{column}' for side in ('user1', 'user2') for column in MessageSenderSerializer.Meta.fields),
+            *(f'last_message__{column}' for column in LAST_MESSAGE_COLUMNS),
+        )
 
 
 class MarkReadView(APIView):
@@ -169,12 +193,7 @@ class MarkReadView(APIView):
             )
 
         # Mark all unread messages from other user as read
-        updated = Message.objects.filter(
-            match=match,
-            read_at__isnull=True
-        ).exclude(
-            sender=request.user
-        ).update(read_at=timezone.now())
+        updated = mark_read(match, request.user)
 
         return Response({
             'success': True,
@@ -0,0 +1,88 @@
+"""
+WebSocket endpoint for real-time chat events (apps.messaging.realtime).
+
+    wss://<host>/ws/?token=<access token>
+
+Clients that can set headers may send `Authorization: Bearer <access token>`
+instead. The server only sends: each text frame is one JSON event. Frames
+from the client are ignored.
+"""
+
+import asyncio
+import json
+from typing import Optional
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .realtime import get_broker
+
+CLOSE_UNAUTHORIZED = 4401
+
+
+def _token(scope) -> Optional[str]:
+    for name, value in scope.get('headers', ()):
+        if name == b'authorization':
+            parts = value.decode('latin1').split()
+            if len(parts) == 2 and parts[0] in api_settings.AUTH_HEADER_TYPES:
+                return parts[1]
+    query = parse_qs(scope.get('query_string', b'').decode('latin1'))
+    return query.get('token', [None])[0]
+
+
+@sync_to_async
+def _authenticate(token: str) -> Optional[int]:
+    """Id of the active user the access token belongs to, or None."""
+    from django.contrib.auth import get_user_model
+
+    try:
+        user_id = AccessToken(token)[api_settings.USER_ID_CLAIM]
+    except (TokenError, KeyError):
+        return None
+
+    close_old_connections()
+    try:
+        return get_user_model().objects.filter(
+            **{api_settings.USER_ID_FIELD: user_id},
+            is_active=True,
+        ).values_list('pk', flat=True).first()
+    finally:
+        close_old_connections()
+
+
+async def _send_events(subscription, send):
+    while True:
+        event = await subscription.get()
+        await send({'type': 'websocket.send', 'text': json.dumps(event)})
+
+
+async def websocket_application(scope, receive, send):
+    """ASGI application for one WebSocket connection."""
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+
+    token = _token(scope)
+    user_id = await _authenticate(token) if token else None
+    if user_id is None:
+        await send({'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED})
+        return
+
+    broker = get_broker()
+    subscription = await broker.subscribe(user_id)
+    await send({'type': 'websocket.accept'})
+    sender = asyncio.create_task(_send_events(subscription, send))
+    try:
+        while True:
+            message = await receive()
+            if message['type'] == 'websocket.disconnect':
+                break
+    finally:
+        sender.cancel()
+        # Collects a send error from a connection that went away
+        await asyncio.gather(sender, return_exceptions=True)
+        await broker.unsubscribe(subscription)
@@ -18,6 +18,19 @@ HARMONY_MATRIX = {
     9: {1: 85, 2: 75, 3: 90, 4: 55, 5: 90, 6: 95, 7: 70, 8: 65, 9: 80},
 }
 
+# Weight of each number in the overall score (Life Path is most important)
+NUMBER_WEIGHTS = {
+    'life_path': 0.35,
+    'soul_urge': 0.30,
+    'expression': 0.20,
+    'personality': 0.15,
+}
+
+
+def reduce_number(num: int) -> int:
+    """Reduce a master number (11, 22, 33) to its 1-9 harmony row."""
+    return num if num <= 9 else (num % 10) or 9
+
 
 def get_pair_harmony(num1: int, num2: int) -> int:
     """
@@ -31,12 +44,21 @@ def get_pair_harmony(num1: int, num2: int) -> int:
         Harmony score 0-100
     """
     # Reduce master numbers for comparison
-    n1 = num1 if num1 <= 9 else (num1 % 10) or 9
-    n2 = num2 if num2 <= 9 else (num2 % 10) or 9
+    n1 = reduce_number(num1)
+    n2 = reduce_number(num2)
 
     return HARMONY_MATRIX.get(n1, {}).get(n2, 50)
 
 
+def get_max_harmony(num: int) -> int:
+    """
+    Get the best harmony score any partner number can reach with `num`.
+
+    Used as an upper bound when ranking candidates without knowing their numbers.
+    """
+    return max(HARMONY_MATRIX.get(reduce_number(num), {}).values(), default=50)
+
+
 def calculate_compatibility(user1_nums: Dict, user2_nums: Dict) -> Dict:
     """
     Calculate full numerology compatibility between two users.
@@ -56,17 +78,27 @@ def calculate_compatibility(user1_nums: Dict, user2_nums: Dict) -> Dict:
             'strengths': list[str],
         }
     """
-    life_path_harmony = get_pair_harmony(user1_nums['life_path'], user2_nums['life_path'])
-    soul_connection = get_pair_harmony(user1_nums['soul_urge'], user2_nums['soul_urge'])
-    expression_sync = get_pair_harmony(user1_nums['expression'], user2_nums['expression'])
-    personality_match = get_pair_harmony(user1_nums['personality'], user2_nums['personality'])
-
-    # Weighted average (Life Path is most important)
-    overall_score = int(
-        life_path_harmony * 0.35 +
-        soul_connection * 0.30 +
-        expression_sync * 0.20 +
-        personality_match * 0.15
+    return compatibility_from_harmonies(
+        get_pair_harmony(user1_nums['life_path'], user2_nums['life_path']),
+        get_pair_harmony(user1_nums['soul_urge'], user2_nums['soul_urge']),
+        get_pair_harmony(user1_nums['expression'], user2_nums['expression']),
+        get_pair_harmony(user1_nums['personality'], user2_nums['personality']),
+    )
+
+
+def compatibility_from_harmonies(
+    life_path_harmony: int,
+    soul_connection: int,
+    expression_sync: int,
+    personality_match: int,
+) -> Dict:
+    """
+    Build the calculate_compatibility() result from the four pair harmonies.
+
+    Lets a stored breakdown be rebuilt from its harmonies alone.
+    """
+    overall_score = _weighted_score(
+        life_path_harmony, soul_connection, expression_sync, personality_match
     )
 
     # Generate interpretation
@@ -100,6 +132,36 @@ def calculate_compatibility(user1_nums: Dict, user2_nums: Dict) -> Dict:
     }
 
 
+def calculate_compatibility_score(user1_nums: Dict, user2_nums: Dict) -> int:
+    """
+    Calculate only the overall numerology score between two users.
+
+    Same result as calculate_compatibility()['overall_score'] without building
+    the interpretation lists.
+    """
+    return _weighted_score(
+        get_pair_harmony(user1_nums['life_path'], user2_nums['life_path']),
+        get_pair_harmony(user1_nums['soul_urge'], user2_nums['soul_urge']),
+        get_pair_harmony(user1_nums['expression'], user2_nums['expression']),
+        get_pair_harmony(user1_nums['personality'], user2_nums['personality']),
+    )
+
+
+def _weighted_score(
+    life_path_harmony: int,
+    soul_connection: int,
+    expression_sync: int,
+    personality_match: int
+) -> int:
+    """Weighted average of the four harmonies (Life Path is most important)."""
+    return int(
+        life_path_harmony * NUMBER_WEIGHTS['life_path'] +
+        soul_connection * NUMBER_WEIGHTS['soul_urge'] +
+        expression_sync * NUMBER_WEIGHTS['expression'] +
+        personality_match * NUMBER_WEIGHTS['personality']
+    )
+
+
 def get_match_type(overall_score: int) -> str:
     """
     Classify match type based on overall compatibility score.
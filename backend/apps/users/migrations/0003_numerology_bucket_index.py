@@ -0,0 +1,21 @@
+# Generated by Django 6.1.2 on 2026-10-19 03:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_add_device_model'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='user',
+            name='users_life_pa_dc433c_idx',
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['life_path', 'soul_urge', 'expression', 'personality'], name='users_life_pa_329210_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 6.1.2 on 2026-10-19 03:18
+
+from django.db import migrations, models
+
+# Frozen copy of apps.users.models.GENDER_BITS / gender_mask as of this migration
+GENDER_BITS = {
+    'male': 1,
+    'female': 2,
+    'non_binary': 4,
+    'other': 8,
+}
+
+
+def gender_mask(genders):
+    mask = 0
+    for gender in genders or []:
+        mask |= GENDER_BITS.get(gender, 0)
+    return mask
+
+
+def fill_gender_bitmasks(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+
+    batch = []
+    for user in User.objects.only('id', 'gender', 'interested_in').iterator():
+        user.gender_bit = GENDER_BITS.get(user.gender, 0)
+        user.interested_in_mask = gender_mask(user.interested_in)
+        batch.append(user)
+        if len(batch) >= 1000:
+            User.objects.bulk_update(batch, ['gender_bit', 'interested_in_mask'])
+            batch = []
+    User.objects.bulk_update(batch, ['gender_bit', 'interested_in_mask'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_current_location'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='user',
+            name='users_is_acti_6725d9_idx',
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='gender_bit',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='interested_in_mask',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['is_active', 'is_profile_complete', 'gender_bit'], name='users_is_acti_eb4b27_idx'),
+        ),
+        migrations.RunPython(fill_gender_bitmasks, migrations.RunPython.noop),
+    ]
@@ -2,10 +2,51 @@
 User model with numerology and astrology profile.
 """
 
+from typing import List, Optional
+
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
 
+# One bit per gender so preferences can be compared as integer masks
+GENDER_BITS = {
+    'male': 1,
+    'female': 2,
+    'non_binary': 4,
+    'other': 8,
+}
+
+
+def gender_mask(genders) -> int:
+    """Encode a list of genders as a GENDER_BITS mask."""
+    mask = 0
+    for gender in genders or []:
+        mask |= GENDER_BITS.get(gender, 0)
+    return mask
+
+
+def masks_accepting(bit: int) -> List[int]:
+    """Every interested_in_mask value open to a gender bit (0 means open to all)."""
+    return [
+        mask for mask in range(max(GENDER_BITS.values()) * 2)
+        if mask == 0 or mask & bit
+    ]
+
+
+# Fixed latitude/longitude grid for distance-filtered scans
+GEO_CELL_DEGREES = 0.5
+GEO_GRID_ROWS = int(180 / GEO_CELL_DEGREES)
+GEO_GRID_COLUMNS = int(360 / GEO_CELL_DEGREES)
+
+
+def geo_cell(latitude, longitude) -> Optional[int]:
+    """Grid cell (row * GEO_GRID_COLUMNS + column) containing a location."""
+    if latitude is None or longitude is None:
+        return None
+    row = min(max(int((latitude + 90) // GEO_CELL_DEGREES), 0), GEO_GRID_ROWS - 1)
+    column = int(((longitude + 180) % 360) // GEO_CELL_DEGREES)
+    return row * GEO_GRID_COLUMNS + column
+
 
 class UserManager(BaseUserManager):
     """Custom user manager with email as the unique identifier."""
@@ -74,6 +115,11 @@ class User(AbstractUser):
     # Full chart data (JSON for flexibility)
     chart_data = models.JSONField(null=True, blank=True)
 
+    # Bumped by save() whenever a COMPATIBILITY_FIELDS value changes; cached
+    # pair compatibility and scan tokens are keyed on it, so a QuerySet.update()
+    # of those fields must bump it as well
+    profile_version = models.PositiveIntegerField(default=1)
+
     # Profile
     bio = models.TextField(max_length=500, blank=True)
     photos = models.JSONField(default=list)  # List of photo URLs
@@ -93,6 +139,11 @@ class User(AbstractUser):
     )
     interested_in = models.JSONField(default=list)  # List of genders
 
+    # Integer mirrors of gender / interested_in (GENDER_BITS) for indexed
+    # two-way preference checks, set in save()
+    gender_bit = models.PositiveSmallIntegerField(default=0, editable=False)
+    interested_in_mask = models.PositiveSmallIntegerField(default=0, editable=False)
+
     # Status
     is_verified = models.BooleanField(default=False)
     is_profile_complete = models.BooleanField(default=False)
@@ -103,6 +154,17 @@ class User(AbstractUser):
     distance_km_preference = models.IntegerField(default=100)
     women_first_messaging = models.BooleanField(default=False)
 
+    # Current location (for distance filtering)
+    latitude = models.FloatField(
+        null=True, blank=True,
+        validators=[MinValueValidator(-90), MaxValueValidator(90)]
+    )
+    longitude = models.FloatField(
+        null=True, blank=True,
+        validators=[MinValueValidator(-180), MaxValueValidator(180)]
+    )
+    geo_cell = models.IntegerField(null=True, blank=True, editable=False)  # set in save()
+
     # Tracking
     last_active = models.DateTimeField(auto_now=True)
     last_scan_at = models.DateTimeField(null=True, blank=True)
@@ -118,18 +180,88 @@ class User(AbstractUser):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['display_name', 'birth_date']
 
+    # Fields calculate_full_compatibility reads
+    COMPATIBILITY_FIELDS = (
+        'life_path', 'soul_urge', 'expression', 'personality',
+        'sun_sign', 'chart_data',
+    )
+
+    # Fields that decide whose scans a user appears in, and whom they see
+    SCAN_FIELDS = (
+        'is_active', 'is_profile_complete', 'birth_date',
+        'gender', 'interested_in',
+        'age_min_preference', 'age_max_preference', 'distance_km_preference',
+        'latitude', 'longitude',
+    )
+
     class Meta:
         db_table = 'users'
         indexes = [
-            models.Index(fields=['life_path']),
+            # Numerology bucket index for top-k scan retrieval (covers life_path alone too)
+            models.Index(fields=['life_path', 'soul_urge', 'expression', 'personality']),
             models.Index(fields=['sun_sign']),
-            models.Index(fields=['is_active', 'is_profile_complete']),
+            models.Index(fields=['is_active', 'is_profile_complete', 'gender_bit']),
             models.Index(fields=['gender']),
+            models.Index(fields=['updated_at']),
+            models.Index(fields=['geo_cell']),
         ]
 
     def __str__(self):
         return f"{self.display_name} ({self.email})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._tracked_snapshot = instance._tracked_values()
+        return instance
+
+    def _tracked_values(self):
+        """Loaded values of COMPATIBILITY_FIELDS and SCAN_FIELDS (deferred fields are skipped)."""
+        return {
+            field: self.__dict__[field]
+            for field in (*self.COMPATIBILITY_FIELDS, *self.SCAN_FIELDS)
+            if field in self.__dict__
+        }
+
+    def save(self, *args, **kwargs):
+        snapshot = getattr(self, '_tracked_snapshot', None)
+        update_fields = kwargs.get('update_fields')
+
+        if update_fields is None or {'latitude', 'longitude'} & set(update_fields):
+            self.geo_cell = geo_cell(self.latitude, self.longitude)
+            if update_fields is not None:
+                update_fields = kwargs['update_fields'] = [*update_fields, 'geo_cell']
+
+        if update_fields is None or {'gender', 'interested_in'} & set(update_fields):
+            self.gender_bit = GENDER_BITS.get(self.gender, 0)
+            self.interested_in_mask = gender_mask(self.interested_in)
+            if update_fields is not None:
+                update_fields = kwargs['update_fields'] = [
+                    *update_fields, 'gender_bit', 'interested_in_mask',
+                ]
+
+        # Tracked fields this save writes a new value for; None for new users.
+        # Kept on the instance for post_save receivers.
+        self.changed_fields = None
+        if snapshot is not None:
+            self.changed_fields = {
+                field for field, value in self._tracked_values().items()
+                if field in snapshot and snapshot[field] != value
+                and (update_fields is None or field in update_fields)
+            }
+            if self.changed_fields & set(self.COMPATIBILITY_FIELDS):
+                self.profile_version += 1
+                if update_fields is not None:
+                    kwargs['update_fields'] = [*update_fields, 'profile_version']
+
+        # auto_now only writes updated_at when it is listed; incremental
+        # readers (the scan feature store) key off it
+        if update_fields and 'updated_at' not in update_fields:
+            kwargs['update_fields'] = [*kwargs['update_fields'], 'updated_at']
+
+        super().save(*args, **kwargs)
+        self._tracked_snapshot = self._tracked_values()
+
     def get_numerology(self):
         """Return numerology numbers as a dictionary."""
         master_numbers = []
@@ -6,6 +6,7 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 
+from core.fieldsets import SparseFieldsetMixin
 from apps.numerology.engine import calculate_all as calculate_numerology
 from apps.astrology.engine import calculate_full_chart, get_sun_sign, get_moon_sign, serialize_chart
 
@@ -30,7 +31,7 @@ class AstrologySerializer(serializers.Serializer):
     planets = serializers.DictField()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for user profile data."""
     numerology = serializers.SerializerMethodField()
     astrology = serializers.SerializerMethodField()
@@ -46,6 +47,7 @@ class UserSerializer(serializers.ModelSerializer):
             'is_verified', 'is_profile_complete',
             'age_min_preference', 'age_max_preference',
             'distance_km_preference', 'women_first_messaging',
+            'latitude', 'longitude',
             'chart_level', 'age',
             'numerology', 'astrology',
             'created_at', 'last_active',
@@ -165,6 +167,7 @@ class ProfileUpdateSerializer(serializers.ModelSerializer):
             'gender', 'interested_in',
             'age_min_preference', 'age_max_preference',
             'distance_km_preference', 'women_first_messaging',
+            'latitude', 'longitude',
         ]
 
     def update(self, instance, validated_data):
@@ -174,6 +177,7 @@ class ProfileUpdateSerializer(serializers.ModelSerializer):
         # Mark profile as complete if required fields are filled
         if (instance.bio and instance.photos and instance.gender):
             instance.is_profile_complete = True
-            instance.save(update_fields=['is_profile_complete'])
+            # updated_at is the scan feature store's change watermark
+            instance.save(update_fields=['is_profile_complete', 'updated_at'])
 
         return instance
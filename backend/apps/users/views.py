@@ -24,6 +24,7 @@ from .serializers import (
 )
 from apps.numerology.engine import calculate_all as calculate_numerology
 from apps.astrology.engine import calculate_full_chart, serialize_chart
+from core.fieldsets import SparseFieldsetViewMixin
 
 User = get_user_model()
 
@@ -102,11 +103,11 @@ class RefreshView(TokenRefreshView):
     permission_classes = [AllowAny]
 
 
-class ProfileView(generics.RetrieveUpdateAPIView):
+class ProfileView(SparseFieldsetViewMixin, generics.RetrieveUpdateAPIView):
     """
     User profile endpoint.
 
-    GET /api/v1/profile/me/
+    GET /api/v1/profile/me/ (supports ?fields=)
     PATCH /api/v1/profile/me/
     """
     permission_classes = [IsAuthenticated]
@@ -13,4 +13,20 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once Django is set up
+from apps.messaging.websocket import websocket_application  # noqa: E402
+
+WEBSOCKET_PATH = '/ws/'
+
+
+async def application(scope, receive, send):
+    """HTTP goes to Django; WebSockets on WEBSOCKET_PATH get real-time chat events."""
+    if scope['type'] == 'websocket':
+        if scope['path'] == WEBSOCKET_PATH:
+            return await websocket_application(scope, receive, send)
+        await receive()
+        await send({'type': 'websocket.close'})
+        return
+    return await django_application(scope, receive, send)
@@ -6,6 +6,7 @@ Common settings shared across all environments.
 import os
 from pathlib import Path
 from datetime import timedelta
+from importlib.util import find_spec
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -99,6 +100,9 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Optional MessagePack content negotiation (`perf` extra)
+MSGPACK_AVAILABLE = find_spec('msgpack') is not None
+
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -112,8 +116,23 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # orjson-backed JSON (stdlib fallback); MessagePack when msgpack is installed
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+        *(['core.renderers.MessagePackRenderer'] if MSGPACK_AVAILABLE else []),
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.ORJSONParser',
+        *(['core.parsers.MessagePackParser'] if MSGPACK_AVAILABLE else []),
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# Compiled to_representation for hot read serializers (core.compiled)
+FAST_SERIALIZERS = os.environ.get('FAST_SERIALIZERS', 'false').lower() == 'true'
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
@@ -124,6 +143,61 @@ SIMPLE_JWT = {
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
 }
 
+# Scan feature store - shared-memory candidate columns (needs the `perf` extra)
+SCAN_FEATURE_STORE_ENABLED = os.environ.get('SCAN_FEATURE_STORE_ENABLED', 'false').lower() == 'true'
+SCAN_FEATURE_STORE_NAME = os.environ.get('SCAN_FEATURE_STORE_NAME', 'numeros_scan')
+SCAN_FEATURE_STORE_CAPACITY = 100_000  # initial rows, doubles when full
+SCAN_FEATURE_STORE_REFRESH_SECONDS = 5  # how often workers poll the updated_at watermark
+SCAN_FEATURE_STORE_REFRESH_LAG_SECONDS = 60  # re-read window for transactions that commit late
+SCAN_FEATURE_STORE_SWEEP_SECONDS = 300  # how often rows of deleted/deactivated users are swept out
+
+# Parallel scan scoring - worker count (0 = score inline) and the pool sizes below
+# which scoring always stays inline
+SCAN_PARALLEL_WORKERS = int(os.environ.get('SCAN_PARALLEL_WORKERS', '0'))
+SCAN_PARALLEL_MIN_ROWS = 50_000  # feature store rows (vectorized, thread pool)
+SCAN_PARALLEL_MIN_CANDIDATES = 500  # full compatibility calculations (process pool)
+
+# Scan feeds - per-user precomputed candidates, maintained in the background
+SCAN_FEED_ENABLED = os.environ.get('SCAN_FEED_ENABLED', 'false').lower() == 'true'
+SCAN_FEED_SIZE = 200  # candidates kept per feed
+SCAN_FEED_LOW_WATER = 40  # refill below this many entries
+SCAN_FEED_WORKERS = 2  # background refresh threads per process
+
+# Scan latency budget in ms (0 = unbounded); slower scans return the best found so far
+SCAN_LATENCY_BUDGET_MS = int(os.environ.get('SCAN_LATENCY_BUDGET_MS', '0'))
+
+# Scan sessions - ranked candidate snapshots paged with a cursor
+SCAN_SESSION_SIZE = 100  # candidates ranked per scan, and most a feed scan pages through
+SCAN_SESSION_TTL = 60 * 15  # seconds a cursor stays valid
+SCAN_TOKEN_MAX_AGE = 60 * 60 * 24  # seconds a scan token's score is reused by a resonance
+
+# Cache - per-process by default; production uses Redis when REDIS_URL is set
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Pair compatibility cache (keyed on both users' profile_version)
+COMPATIBILITY_CACHE_TIMEOUT = 60 * 60 * 24  # 1 day in the shared cache
+COMPATIBILITY_CACHE_LOCAL_SIZE = 4096  # entries in each process's LRU
+
+# Expired maybe_later resonances (manage.py sweep_maybe_later):
+# 'release' deletes them so the users show up in scans again, 'decline' keeps them as passes
+MAYBE_LATER_EXPIRED_POLICY = os.environ.get('MAYBE_LATER_EXPIRED_POLICY', 'release')
+MAYBE_LATER_SWEEP_BATCH = 1000
+
+# "Likes you" inbox badge counts
+INBOX_COUNT_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Real-time chat events over /ws/ (apps.messaging.realtime). LocalBroker serves
+# single-process ASGI deployments; ChannelLayerBroker needs CHANNEL_LAYERS
+REALTIME_BROKER = os.environ.get('REALTIME_BROKER', 'apps.messaging.realtime.LocalBroker')
+REALTIME_SEND_BUFFER = 100  # events queued per connection before it is told to resync
+
+# Per-user seen-sets (resonated ids, subtracted from scans in memory)
+SEEN_SET_CACHE_TIMEOUT = 60 * 60 * 24 * 7  # rebuilt from the DB after expiry
+
 # Swiss Ephemeris path
 EPHE_PATH = os.environ.get('EPHE_PATH', str(BASE_DIR / 'ephe'))
 
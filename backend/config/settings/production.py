@@ -3,6 +3,8 @@ Django production settings for numeros project.
 """
 
 import os
+from importlib.util import find_spec
+
 from .base import *  # noqa: F401, F403
 
 DEBUG = False
@@ -28,6 +30,24 @@ DATABASES = {
     }
 }
 
+# Cache
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+
+# Channel layer for ChannelLayerBroker (channels-redis, `prod` extra)
+if os.environ.get('REDIS_URL') and find_spec('channels_redis'):
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [os.environ['REDIS_URL']]},
+        }
+    }
+
 # CORS
 CORS_ALLOWED_ORIGINS = [
     'https://numeros.app',
@@ -0,0 +1,155 @@
+"""
+Compiled fast-path serializers for hot read endpoints.
+
+DRF's Serializer.to_representation walks its fields generically for every
+object: get_attribute() through source_attrs, a None check via PKOnlyObject,
+then the field's to_representation. For a fixed field set that work can be
+done once. CompiledSerializerMixin generates a flat function per serializer
+class and field set, e.g.
+
+    def represent(instance):
+        v0 = instance.id
+        v1 = instance.display_name
+        v2 = instance.photos
+        return {
+            'id': None if v0 is None else int(v0),
+            'display_name': None if v1 is None else str(v1),
+            'photos': v2,
+            ...
+        }
+
+Output is the same as DRF's. Plain integer, string and JSON fields are
+inlined; method fields call their method directly; anything else (choices,
+datetimes, nested serializers) calls the field's own to_representation.
+
+Opt in with FAST_SERIALIZERS; when it is off the serializers behave exactly
+like DRF's.
+"""
+
+from typing import Callable, Dict, Tuple
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+# (serializer class, readable field names) -> factory building represent()
+_factories: Dict[Tuple[type, Tuple[str, ...]], Callable] = {}
+
+# Field types whose to_representation can be inlined, as an expression of `v`
+_INLINE = {
+    serializers.IntegerField: 'int({v})',
+    serializers.CharField: 'str({v})',
+    serializers.JSONField: '{v}',
+    serializers.ReadOnlyField: '{v}',
+}
+
+
+def fast_serializers_enabled() -> bool:
+    return settings.FAST_SERIALIZERS
+
+
+def _is_plain_attribute(model, name: str) -> bool:
+    """Whether reading `name` needs none of get_attribute()'s special cases."""
+    if model is None:
+        return False
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        # Properties are read as-is; methods would be called by DRF
+        return isinstance(getattr(model, name, None), property)
+    return field.concrete and not field.is_relation
+
+
+def _inline(field) -> str:
+    """Inline conversion template for a field, or '' to call its to_representation."""
+    if type(field) not in _INLINE:
+        return ''
+    if isinstance(field, serializers.JSONField) and field.binary:
+        return ''
+    return _INLINE[type(field)]
+
+
+def _compile(serializer_class: type, fields: Dict) -> Callable:
+    """Generate the factory for one serializer class and field set."""
+    model = getattr(getattr(serializer_class, 'Meta', None), 'model', None)
+
+    lines = []
+    entries = []
+    args = []
+    for index, (name, field) in enumerate(fields.items()):
+        if isinstance(field, serializers.SerializerMethodField):
+            args.append(f'f{index}')
+            entries.append(f'{name!r}: f{index}(instance)')
+            continue
+
+        if len(field.source_attrs) == 1 and _is_plain_attribute(model, field.source):
+            lines.append(f'v{index} = instance.{field.source}')
+        else:
+            args.append(f'a{index}')
+            lines.append(f'v{index} = a{index}(instance)')
+
+        template = _inline(field)
+        if template and template == '{v}':
+            entries.append(f'{name!r}: v{index}')
+        elif template:
+            entries.append(f'{name!r}: None if v{index} is None else {template.format(v=f"v{index}")}')
+        else:
+            args.append(f'f{index}')
+            entries.append(f'{name!r}: None if v{index} is None else f{index}(v{index})')
+
+    source = '\n'.join([
+        f'def factory({", ".join(args)}):',
+        '    def represent(instance):',
+        *(f'        {line}' for line in lines),
+        '        return {',
+        *(f'            {entry},' for entry in entries),
+        '        }',
+        '    return represent',
+    ])
+    namespace: Dict = {}
+    exec(compile(source, f'<compiled {serializer_class.__name__}>', 'exec'), namespace)
+    return namespace['factory']
+
+
+class CompiledSerializerMixin:
+    """
+    Serializer mixin replacing to_representation with a compiled function
+    when FAST_SERIALIZERS is on.
+
+    Only for read-only output of plain objects; fields that need DRF's
+    generic handling still get it through their own to_representation.
+    """
+
+    def to_representation(self, instance):
+        if not fast_serializers_enabled():
+            return super().to_representation(instance)
+
+        represent = getattr(self, '_represent', None)
+        if represent is None:
+            represent = self._represent = self._build_represent()
+        return represent(instance)
+
+    def _build_represent(self) -> Callable:
+        fields = {field.field_name: field for field in self._readable_fields}
+
+        # Related fields use PKOnlyObject tricks; leave those shapes to DRF
+        if any(isinstance(field, (serializers.RelatedField, serializers.ManyRelatedField)) for field in fields.values()):
+            return super().to_representation
+
+        key = (type(self), tuple(fields))
+        factory = _factories.get(key)
+        if factory is None:
+            factory = _factories[key] = _compile(type(self), fields)
+
+        # Bind the factory's arguments in the order _compile() declared them
+        bound = []
+        model = getattr(getattr(self, 'Meta', None), 'model', None)
+        for name, field in fields.items():
+            if isinstance(field, serializers.SerializerMethodField):
+                bound.append(getattr(field.parent, field.method_name))
+                continue
+            if not (len(field.source_attrs) == 1 and _is_plain_attribute(model, field.source)):
+                bound.append(field.get_attribute)
+            if not _inline(field):
+                bound.append(field.to_representation)
+        return factory(*bound)
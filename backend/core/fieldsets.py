@@ -0,0 +1,168 @@
+"""
+Sparse fieldsets for API responses.
+
+    ?fields=id,overall_score,other_user.display_name,other_user.photos
+
+keeps only the listed fields. A dotted name picks fields of a nested
+serializer; naming the nested field alone keeps all of it. Unknown names are
+ignored.
+
+    ?expand=chart
+    ?omit=chart
+
+turn optional parts of a response on and off. Fields in a serializer's
+Meta.expandable_fields are left out unless expanded; serializers can also
+check expanded() and omitted() for parts of a field.
+
+Views with SparseFieldsetViewMixin pass all three to the serializer context
+and narrow their queryset with only() to the columns the kept fields read.
+"""
+
+from typing import Dict, FrozenSet, List, Optional
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+def parse_fieldset(value: Optional[str]) -> Optional[Dict[str, Dict]]:
+    """
+    Parse a ?fields= value into a tree of field names.
+
+    'id,other_user.photos' -> {'id': {}, 'other_user': {'photos': {}}}.
+    An empty dict keeps every field below it. None when no fields were given.
+    """
+    if not value:
+        return None
+
+    tree: Dict[str, Dict] = {}
+    for path in value.split(','):
+        node = tree
+        for name in path.strip().split('.'):
+            if name:
+                node = node.setdefault(name, {})
+    return tree or None
+
+
+def parse_expand(value: Optional[str]) -> FrozenSet[str]:
+    """Parse a ?expand= or ?omit= value into a set of names."""
+    if not value:
+        return frozenset()
+    return frozenset(name.strip() for name in value.split(',') if name.strip())
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin trimming output to the requested fields.
+
+    The root serializer reads the requested fields from the context
+    ('sparse_fields'); nested sparse serializers get their part of the tree
+    from their parent, or as the sparse_fields argument.
+
+    Meta.field_sources maps fields that are not model fields (method fields,
+    properties) to the model columns they read, for model_fields().
+    """
+
+    def __init__(self, *args, sparse_fields: Optional[Dict] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._sparse_fields = sparse_fields
+
+    @property
+    def sparse_fields(self) -> Optional[Dict]:
+        """Requested field tree, or None for every field."""
+        if self._sparse_fields is not None:
+            return self._sparse_fields or None
+
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if parent is None:
+            return self.context.get('sparse_fields')
+        return None
+
+    def expanded(self, name: str) -> bool:
+        return name in self.context.get('expand', ())
+
+    def omitted(self, name: str) -> bool:
+        return name in self.context.get('omit', ())
+
+    def get_fields(self):
+        fields = super().get_fields()
+
+        for name in getattr(self.Meta, 'expandable_fields', ()):
+            if not self.expanded(name):
+                fields.pop(name, None)
+
+        selected = self.sparse_fields
+        if selected is None:
+            return fields
+
+        fields = {name: field for name, field in fields.items() if name in selected}
+        for name, field in fields.items():
+            nested = field.child if isinstance(field, serializers.ListSerializer) else field
+            if isinstance(nested, SparseFieldsetMixin):
+                nested._sparse_fields = selected[name]
+        return fields
+
+    def model_fields(self) -> Optional[List[str]]:
+        """
+        Model columns read by the kept fields, for QuerySet.only().
+
+        Returns:
+            Column paths (nested serializers as 'relation__column'), or None
+            when a field's columns are unknown and nothing should be deferred
+        """
+        model = self.Meta.model
+        sources = getattr(self.Meta, 'field_sources', {})
+        columns: List[str] = []
+
+        for name, field in self.fields.items():
+            if field.write_only:
+                continue
+            if name in sources:
+                columns.extend(sources[name])
+                continue
+
+            if isinstance(field, SparseFieldsetMixin):
+                nested = field.model_fields()
+                if nested is None:
+                    return None
+                columns.append(field.source)
+                columns.extend(f'{field.source}__{column}' for column in nested)
+                continue
+
+            try:
+                model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                return None
+            columns.append(field.source)
+
+        return columns
+
+
+class SparseFieldsetViewMixin:
+    """
+    View mixin for ?fields=, ?expand= and ?omit=.
+
+    Puts them in the serializer context; project() narrows a queryset to
+    the columns the response needs.
+    """
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['sparse_fields'] = parse_fieldset(self.request.query_params.get('fields'))
+        context['expand'] = parse_expand(self.request.query_params.get('expand'))
+        context['omit'] = parse_expand(self.request.query_params.get('omit'))
+        return context
+
+    def project(self, queryset, *required: str):
+        """
+        Apply only() for the serializer's fields.
+
+        Args:
+            queryset: Queryset to narrow
+            required: Columns the view itself needs (e.g. select_related relations)
+        """
+        columns = self.get_serializer().model_fields()
+        if columns is None:
+            return queryset
+        return queryset.only(*required, *columns)
@@ -2,7 +2,14 @@
 Custom DRF pagination classes.
 """
 
-from rest_framework.pagination import CursorPagination, PageNumberPagination
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
+from rest_framework.response import Response
 
 
 class StandardCursorPagination(CursorPagination):
@@ -23,10 +30,108 @@ class StandardPagePagination(PageNumberPagination):
     max_page_size = 100
 
 
-class MessagePagination(CursorPagination):
+class ConversationPagination(CursorPagination):
     """
-    Pagination for chat messages (newest first).
+    Keyset pagination for conversations, most recent activity first.
+
+    Pages on Match.activity_at. Keeps the conversation list's response
+    keys; count is the total number of conversations, not of this page.
     """
     page_size = 50
-    ordering = '-created_at'
-    cursor_query_param = 'before'
+    ordering = ('-activity_at', '-id')
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = queryset.count()
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'conversations': data,
+            'count': self.count,
+            'next': self.get_next_link(),
+        })
+
+
+class MessagePagination(BasePagination):
+    """
+    Keyset pagination for chat messages on (created_at, id).
+
+    Without a cursor returns the newest page; ?before=<cursor> pages back
+    through older messages and ?after=<cursor> returns messages newer than
+    the cursor, for incremental sync. Results are always oldest first.
+    Each page is one LIMIT query on the (match, created_at) index - no
+    COUNT, no OFFSET.
+
+    Response keys: results, before (cursor for the older page, null at the
+    start of the conversation), after (cursor to sync newer messages from)
+    and has_newer (more messages after this page already exist).
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    @staticmethod
+    def encode_cursor(message) -> str:
+        """Opaque cursor for a message's position."""
+        position = f'{message.created_at.isoformat()}|{message.id}'
+        return urlsafe_b64encode(position.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, value: str):
+        """(created_at, id) from a cursor; NotFound when malformed."""
+        try:
+            position = urlsafe_b64decode(value + '=' * (-len(value) % 4)).decode()
+            created_at, message_id = position.rsplit('|', 1)
+            created_at = datetime.fromisoformat(created_at)
+            message_id = int(message_id)
+        except (ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if timezone.is_naive(created_at):
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, message_id
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        size = self.get_page_size(request)
+        before = request.query_params.get('before')
+        after = request.query_params.get('after')
+
+        if after:
+            created_at, message_id = self.decode_cursor(after)
+            rows = list(queryset.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=message_id)
+            ).order_by('created_at', 'id')[:size + 1])
+            self.has_newer = len(rows) > size
+            self.page = rows[:size]
+            # The cursor's message itself is older
+            self.has_older = True
+            self.after = self.encode_cursor(self.page[-1]) if self.page else after
+        else:
+            if before:
+                created_at, message_id = self.decode_cursor(before)
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=message_id)
+                )
+            rows = list(queryset.order_by('-created_at', '-id')[:size + 1])
+            self.has_older = len(rows) > size
+            self.page = rows[:size][::-1]
+            self.has_newer = bool(before)
+            self.after = self.encode_cursor(self.page[-1]) if self.page else None
+
+        self.before = self.encode_cursor(self.page[0]) if self.page and self.has_older else None
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'results': data,
+            'before': self.before,
+            'after': self.after,
+            'has_newer': self.has_newer,
+        })
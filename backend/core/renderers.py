@@ -0,0 +1,69 @@
+"""
+Custom DRF renderers.
+
+ORJSONRenderer is the default JSON renderer. It encodes with orjson and keeps
+DRF's output: datetimes, Decimals and the other types DRF's encoder handles
+go through that encoder, and \\u2028/\\u2029 stay escaped. Without orjson
+(the `perf` extra), or for indented and ASCII-only output, it falls back to
+DRF's JSONRenderer.
+
+MessagePackRenderer serves `Accept: application/msgpack` when msgpack is
+installed.
+"""
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+# DRF's handling of datetimes, Decimals, UUIDs, lazy strings, querysets, ...
+_encode_default = JSONEncoder().default
+
+if ORJSON_AVAILABLE:
+    ORJSON_OPTIONS = (
+        orjson.OPT_PASSTHROUGH_DATETIME  # datetime/date/time formatted like DRF
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+        | orjson.OPT_NON_STR_KEYS
+    )
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSON renderer backed by orjson, with DRF's JSON output."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not ORJSON_AVAILABLE or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=_encode_default, option=ORJSON_OPTIONS)
+
+        # Keep the output a strict JavaScript subset, like DRF
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    """MessagePack renderer for clients sending `Accept: application/msgpack`."""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_encode_default, use_bin_type=True)